@@ -158,11 +158,7 @@ class Block:
             The key indexes for this block (the ordering of the list is undefined; in particular
             don't assume that the key indexes are in increasing order.)
         """
-        key_indexes = []
-        for shuffle_index in range(self._start_index, self._end_index):
-            key_index = self._shuffle.get_key_index(shuffle_index)
-            key_indexes.append(key_index)
-        return key_indexes
+        return self._shuffle.get_key_indexes(self._start_index, self._end_index)
 
     def get_current_parity(self):
         """
@@ -1,4 +1,3 @@
-import copy
 import random
 
 class Key:
@@ -26,6 +25,23 @@ class Key:
             self._size = 0
             self._bits = {}
 
+    @staticmethod
+    def from_bits(bits):
+        """
+        Create a key directly from a sequence of bit values, without parsing characters.
+
+        Args:
+            bits (sequence of int): The bit values (0 or 1), e.g. a list from ndarray.tolist().
+
+        Returns:
+            A key holding the given bits.
+        """
+        # pylint:disable=protected-access
+        key = Key()
+        key._bits = dict(enumerate(bits))
+        key._size = len(key._bits)
+        return key
+
     @staticmethod
     def create_random_key(size):
         """
@@ -65,6 +81,17 @@ class Key:
             string += str(self._bits[i])
         return string
 
+    def __deepcopy__(self, memo):
+        """
+        Deep-copy the key. The bit values are immutable ints, so a shallow copy of the bit
+        dictionary is already a deep copy and avoids per-bit deepcopy dispatch.
+        """
+        # pylint:disable=protected-access
+        key = Key()
+        key._size = self._size
+        key._bits = dict(self._bits)
+        return key
+
     @staticmethod
     def set_random_seed(seed):
         """
@@ -134,7 +161,7 @@ class Key:
         # pylint:disable=protected-access
         key = Key()
         key._size = self._size
-        key._bits = copy.deepcopy(self._bits)
+        key._bits = dict(self._bits)
 
         if error_method == self.ERROR_METHOD_EXACT:
             error_count = round(error_rate * self._size)
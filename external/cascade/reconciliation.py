@@ -120,11 +120,9 @@ class Reconciliation:
     def _register_block_key_indexes(self, block):
         # For every key bit covered by the block, append the block to the list of blocks that depend
         # on that partial key bit.
+        key_index_to_blocks = self._key_index_to_blocks
         for key_index in block.get_key_indexes():
-            if key_index in self._key_index_to_blocks:
-                self._key_index_to_blocks[key_index].append(block)
-            else:
-                self._key_index_to_blocks[key_index] = [block]
+            key_index_to_blocks.setdefault(key_index, []).append(block)
 
     def _get_blocks_containing_key_index(self, key_index):
         return self._key_index_to_blocks.get(key_index, [])
@@ -178,13 +176,7 @@ class Reconciliation:
 
     @staticmethod
     def _bits_in_int(int_value):
-        bits = 0
-        while int_value != 0:
-            bits += 1
-            int_value //= 2
-        if bits == 0:
-            bits = 1
-        return bits
+        return max(int_value.bit_length(), 1)
 
     @staticmethod
     def _bits_in_block_ask_parity(block):
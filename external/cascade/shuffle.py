@@ -36,9 +36,7 @@ class Shuffle:
                 None, then a random shuffle_seed value will be generated.
         """
         self._size = size
-        self._shuffle_index_to_key_index = {}
-        for shuffle_index in range(0, size):
-            self._shuffle_index_to_key_index[shuffle_index] = shuffle_index
+        self._shuffle_index_to_key_index = list(range(size))
         if algorithm == self.SHUFFLE_RANDOM:
             if shuffle_seed is None:
                 shuffle_seed = \
@@ -176,6 +174,19 @@ class Shuffle:
         """
         return self._shuffle_index_to_key_index[shuffle_index]
 
+    def get_key_indexes(self, shuffle_start_index, shuffle_end_index):
+        """
+        Get the key indexes that a contiguous sub-range of shuffle indexes are mapped to.
+
+        Args:
+            shuffle_start_index (int): The first shuffle index (inclusive) of the range.
+            shuffle_end_index (int): The last shuffle index (exclusive) of the range.
+
+        Returns:
+            The list of key indexes, in shuffle index order.
+        """
+        return self._shuffle_index_to_key_index[shuffle_start_index:shuffle_end_index]
+
     def get_bit(self, key, shuffle_index):
         """
         Get a bit from a shuffled key.
@@ -236,9 +247,6 @@ class Shuffle:
         Returns:
             The parity of the contiguous sub-range of bits in the shuffled key.
         """
-        parity = 0
-        for shuffle_index in range(shuffle_start_index, shuffle_end_index):
-            key_index = self._shuffle_index_to_key_index[shuffle_index]
-            if key.get_bit(key_index):
-                parity = 1 - parity
-        return parity
+        # pylint:disable=protected-access
+        key_indexes = self._shuffle_index_to_key_index[shuffle_start_index:shuffle_end_index]
+        return sum(map(key._bits.__getitem__, key_indexes)) & 1
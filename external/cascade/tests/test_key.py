@@ -15,6 +15,14 @@ def test_create_random_key():
     assert key.get_size() == 16
     assert key.__str__() == "1000111110000110"
 
+def test_from_bits():
+    key = Key.from_bits([1, 0, 1, 1, 0])
+    assert key.get_size() == 5
+    assert key.__str__() == "10110"
+    key = Key.from_bits([])
+    assert key.get_size() == 0
+    assert key.__str__() == ""
+
 def test_repr():
     Key.set_random_seed(222)
     key = Key()
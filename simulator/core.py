@@ -3,9 +3,10 @@ import logging
 import numpy as np
 import math
 import time
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 
-from utils.satellite_passes import predict_pass, pass_details, keep_percentage_symmetrically
+from utils.satellite_passes import predict_pass_window, pass_details, keep_percentage_symmetrically
 from utils.transmittance import atmospheric_transmittance, geometric_eff, scintillation_loss, pointing_loss
 from utils.qkd_protocols import parallel_bb84_simulation, parallel_decoy_simulation, get_mismatched_indices, discard_bits
 from utils.parameter_estimation import randomly_select_bits, calculate_qber
@@ -14,8 +15,14 @@ from utils.privacy_amplification import circulant, circulant_seed, toeplitz, toe
 from utils.key_rate import bb84_key_rate, decoy_key_rate
 from utils.weather import classify_climate
 
+# Output bits of the error-verification hash: a universal hash collides with probability 2^-m,
+# so m = log2(1/eps) bits give the verification failure probability eps = 1/4 * 1e-10
+COMPARE_HASH_LENGTH = math.ceil(math.log2(1 / ((1/4)*1e-10)))
+
 def run_qkd_simulation(config):
     start_time = time.time()
+    # One generator shared by the detection sampling and QBER selection; "seed" in the config makes them reproducible
+    rng = np.random.default_rng(config.get("seed"))
     total_uplink_data = 0
     total_downlink_data = 0
     int_size_bits = 32
@@ -27,22 +34,13 @@ def run_qkd_simulation(config):
     date_start = date_start.replace(tzinfo=datetime.timezone.utc)
 
 
-    pass_start, _ , _ = predict_pass(
+    pass_start, pass_end = predict_pass_window(
         "Alice",
         config["ground_latitude"],
         config["ground_longitude"],
         config["ground_altitude"],
         config["satellite_tle"],
         config["min_elevation_angle_start"],
-        date_start,
-    )
-
-    _ , pass_end , _ = predict_pass(
-        "Alice",
-        config["ground_latitude"],
-        config["ground_longitude"],
-        config["ground_altitude"],
-        config["satellite_tle"],
         config["min_elevation_angle_end"],
         date_start,
     )
@@ -75,16 +73,19 @@ def run_qkd_simulation(config):
         satlon = satlon[mask]
         time_quantum_comm = len(range_km)
  
-    total_pulses_sent = config["weak_coherent_pulse_rate"] * 1e6 * int(time_quantum_comm)
+    # Sent totals stay floats; they are only rounded when printed
+    time_quantum_comm = float(time_quantum_comm)
+    total_pulses_sent = config["weak_coherent_pulse_rate"] * 1e6 * time_quantum_comm
     if config["qkd_protocol"] == "decoy_state":
-        total_photons_sent = int(total_pulses_sent * (
+        total_photons_sent = total_pulses_sent * (
             config["signal_prob"] * (1 - math.exp(-config["signal_mean_photon_num"]))
-        ))
+        )
     else:
         total_photons_sent = total_pulses_sent
-    real_photon_rate = total_photons_sent / int(time_quantum_comm)
+    real_photon_rate = total_photons_sent / time_quantum_comm
 
     zenith = 90 - elevation
+    cos_zenith = np.cos(np.deg2rad(zenith))
 
     
     yield f"""
@@ -94,8 +95,8 @@ def run_qkd_simulation(config):
 • Start Time     : {pass_start.strftime('%d/%m/%Y %H:%M:%S')}
 • End Time       : {pass_end.strftime('%d/%m/%Y %H:%M:%S')}
 • Quantum Comm Time   : {time_quantum_comm:.2f} s
-• Max Elevation: {max(elevation):.2f}°
-• Shortest Slant Range: {min(range_km):,.2f} km
+• Max Elevation: {elevation.max():.2f}°
+• Shortest Slant Range: {range_km.min():,.2f} km
 """
 
     if config["weather_auto"]:
@@ -112,46 +113,42 @@ def run_qkd_simulation(config):
         ozone = config["ozone_depth"]
         pressure = config["ground_pressure"]
         aod_500 = config["aerosol_depth"]
-    atmos_transmit = atmospheric_transmittance(config["weather_auto"],climate, pass_start,config["ground_latitude"], config["ground_longitude"], config["ground_altitude"]/1000, config["photon_wavelength"], zenith, water_vapour, ozone, pressure, aod_500, cloud)
+    atmos_transmit = atmospheric_transmittance(config["weather_auto"],climate, pass_start,config["ground_latitude"], config["ground_longitude"], config["ground_altitude"]/1000, config["photon_wavelength"], zenith, water_vapour, ozone, pressure, aod_500, cloud, cos_zenith=cos_zenith)
     logging.disable(logging.NOTSET)
 
-    geometric_transmit = np.array([
-        geometric_eff(
-            config["receiving_telescope_aperture"],
-            config["sending_telescope_aperture"],
-            config["beam_divergence"],
-            slant
-        ) for slant in range_km
-    ])
-    scintillation_transmit = np.array([
-        scintillation_loss(config["photon_wavelength"] * 1e-9, config["receiving_telescope_aperture"], angle, min(config["min_elevation_angle_start"],config["min_elevation_angle_end"]), config["ground_altitude"])
-        for angle in elevation
-    ])
-    
-    pointing_transmit = np.array([
-        pointing_loss(
-            config["beam_divergence"],
-            config["point_acc_min"],
-            config["point_acc_max"],
-            z    
-        )
-        for z in zenith
-    ])
-    photons_reach_detector_per_sec = real_photon_rate * atmos_transmit * geometric_transmit * scintillation_transmit * pointing_transmit * config["detector_efficiency"] * config["optical_efficiency"]
-    photons_measured_per_sec = np.minimum(config["detector_maximum_count_rate"] * 1e6, photons_reach_detector_per_sec)
+    geometric_transmit = geometric_eff(
+        config["receiving_telescope_aperture"],
+        config["sending_telescope_aperture"],
+        config["beam_divergence"],
+        range_km
+    )
+    scintillation_transmit = scintillation_loss(config["photon_wavelength"] * 1e-9, config["receiving_telescope_aperture"], elevation, min(config["min_elevation_angle_start"],config["min_elevation_angle_end"]), config["ground_altitude"], cos_zenith=cos_zenith)
+
+    pointing_transmit = pointing_loss(
+        config["beam_divergence"],
+        config["point_acc_min"],
+        config["point_acc_max"],
+        zenith,
+        cos_zenith
+    )
+    # Build the per-second channel product in a single buffer instead of one temporary per factor
+    channel_transmit = np.multiply(atmos_transmit, geometric_transmit)
+    np.multiply(channel_transmit, scintillation_transmit, out=channel_transmit)
+    np.multiply(channel_transmit, pointing_transmit, out=channel_transmit)
+    avg_transmittance = np.mean(channel_transmit) * config["detector_efficiency"] * config["optical_efficiency"]
+
+    photons_measured_per_sec = channel_transmit
+    photons_measured_per_sec *= real_photon_rate * config["detector_efficiency"] * config["optical_efficiency"]
+    np.minimum(photons_measured_per_sec, config["detector_maximum_count_rate"] * 1e6, out=photons_measured_per_sec)
 
 
     yield ("sat_coords", satlat, satlon, elevation, range_km, photons_measured_per_sec)
     total_photons_arrived = int(np.sum(photons_measured_per_sec))
     
-    avg_transmittance = np.mean(geometric_transmit * scintillation_transmit * atmos_transmit * pointing_transmit* config["detector_efficiency"]) * config["optical_efficiency"]
-    
-    shots = 1 if total_photons_arrived < 1e6 else 10 ** (math.floor(math.log10(total_photons_arrived)) - 5)
-
 
     if config["qkd_protocol"] == "decoy_state":
+        # Dark counts are injected by the decoy simulation on top of the signal detections
         num_dark_counts = int(config["dark_count_rate"] * total_pulses_sent * config["time_window"] * 1e-9)
-        total_photons_arrived += num_dark_counts
 
     yield f"""
 ==============================
@@ -167,9 +164,9 @@ def run_qkd_simulation(config):
 """
 
     if config["qkd_protocol"] == "decoy_state":
-        alice_bitstring, alice_bases, bob_bases, bob_bitstring = parallel_decoy_simulation(500, total_photons_arrived // (500 * shots), config["depolarization_error"], num_dark_counts, shots)
+        alice_bitstring, alice_bases, bob_bases, bob_bitstring = parallel_decoy_simulation(total_photons_arrived, config["depolarization_error"], num_dark_counts, rng)
     else:
-        alice_bitstring, alice_bases, bob_bases, bob_bitstring = parallel_bb84_simulation(total_photons_arrived // (500 * shots), config["depolarization_error"], shots)
+        alice_bitstring, alice_bases, bob_bases, bob_bitstring = parallel_bb84_simulation(total_photons_arrived, config["depolarization_error"], rng)
 
     
     mismatched_indices = get_mismatched_indices(alice_bases, bob_bases)
@@ -188,8 +185,8 @@ def run_qkd_simulation(config):
     total_uplink_data += len(alice_bases)
     total_downlink_data += len(mismatched_indices) * int_size_bits
 
-    string_to_estimate_qber, indices_to_estimate_qber = randomly_select_bits(alice_bitstring, config["percentage_estimate_qber"])
-    estimated_qber = calculate_qber(''.join([bob_bitstring[i] for i in indices_to_estimate_qber]), indices_to_estimate_qber, string_to_estimate_qber)
+    string_to_estimate_qber, indices_to_estimate_qber = randomly_select_bits(alice_bitstring, config["percentage_estimate_qber"], rng)
+    estimated_qber = calculate_qber(bob_bitstring[indices_to_estimate_qber], indices_to_estimate_qber, string_to_estimate_qber)
 
     alice_bitstring = discard_bits(alice_bitstring, indices_to_estimate_qber)
     bob_bitstring = discard_bits(bob_bitstring, indices_to_estimate_qber)
@@ -214,19 +211,16 @@ def run_qkd_simulation(config):
 
     efficiency = max(efficiency, 1)
 
-    reconciled_key = [int(bit) for bit in str(reconciled_key)]
-
     total_downlink_data += ask_bits
     total_uplink_data += reply_bits
 
-    compare_hash_length = math.ceil(math.log(1 / ((1/4)*1e-10)))
 
     if config["two_universal"] == "toeplitz":
-        seed_val = toeplitz_seed(reconciled_key, compare_hash_length)
-        compare_key = toeplitz(reconciled_key, compare_hash_length, seed_val) == toeplitz(alice_bitstring, compare_hash_length, seed_val)
+        seed_val = toeplitz_seed(reconciled_key, COMPARE_HASH_LENGTH)
+        compare_key = toeplitz(reconciled_key, COMPARE_HASH_LENGTH, seed_val) == toeplitz(alice_bitstring, COMPARE_HASH_LENGTH, seed_val)
     else:
         seed_val = circulant_seed(reconciled_key)
-        compare_key = circulant(reconciled_key, compare_hash_length, seed_val) == circulant(alice_bitstring, compare_hash_length, seed_val)
+        compare_key = circulant(reconciled_key, COMPARE_HASH_LENGTH, seed_val) == circulant(alice_bitstring, COMPARE_HASH_LENGTH, seed_val)
    
 
     total_downlink_data += len(seed_val)
@@ -275,7 +269,20 @@ def run_qkd_simulation(config):
 
     yield "\n✔ **QKD Simulation Complete**"
     
-if __name__ == "__main__":
-    print("This script is not meant to be run directly. Run main.py")
 
 
+def _run_to_completion(config):
+    return list(run_qkd_simulation(config))
+
+def simulate_many(configs, max_workers=None):
+    """
+    Run independent simulations (e.g. a sweep over dates or settings) in parallel worker processes.
+
+    Returns, in the order of `configs`, the list of items each run_qkd_simulation call yields.
+    Configs without a "seed" get independent random streams in each worker.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_to_completion, configs))
+
+if __name__ == "__main__":
+    print("This script is not meant to be run directly. Run main.py")
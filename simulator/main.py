@@ -1,17 +1,21 @@
 import datetime
-import socketserver
 import customtkinter as ctk
 from customtkinter import *
 import tkinter as tk
 from tkcalendar import Calendar
 from core import run_qkd_simulation
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 import math
+import numpy as np
 import json
-import webbrowser
-import http.server
+try:
+    import orjson
+except ImportError:  # optional speed-up, presets fall back to the stdlib encoder
+    orjson = None
 import os
+from pathlib import Path
 
 
 # Tooltip class for hover descriptions
@@ -35,6 +39,8 @@ class ToolTip:
         x, y, _, _ = self.widget.bbox("insert")
         x += self.widget.winfo_rootx() + 25
         y += self.widget.winfo_rooty() + 20
+        self.tip_x, self.tip_y = x, y  # The tooltip never moves once placed
+        self.opening_serial = event.serial if event is not None else None
         
         self.tip_window = tw = ctk.CTkToplevel(self.widget)
         tw.wm_overrideredirect(True)
@@ -47,16 +53,21 @@ class ToolTip:
         # Bind click events to close on any click
         tw.bind("<Button-1>", lambda e: self.hide_tip())
         
-        # Bind to root window for clicks anywhere
-        root.bind("<Button-1>", self.check_click_outside)
-        
         ToolTip._current_tooltip = self
+
+    @staticmethod
+    def dispatch_click(event):
+        # Bound once to every widget: only does work while a tooltip is open
+        tooltip = ToolTip._current_tooltip
+        if tooltip is None or event.serial == tooltip.opening_serial:
+            return
+        tooltip.check_click_outside(event)
         
     def check_click_outside(self, event):
         # Check if click was outside the tooltip
         if self.tip_window:
             x, y = event.x_root, event.y_root
-            tx, ty = self.tip_window.winfo_x(), self.tip_window.winfo_y()
+            tx, ty = self.tip_x, self.tip_y
             tw, th = self.tip_window.winfo_width(), self.tip_window.winfo_height()
             
             if not (tx <= x <= tx + tw and ty <= y <= ty + th):
@@ -67,14 +78,16 @@ class ToolTip:
             self.tip_window.destroy()
             self.tip_window = None
             ToolTip._current_tooltip = None
-            # Unbind the root click event
-            root.unbind("<Button-1>")
             
+# Field labels by their text, filled in as the form is built
+label_index = {}
+
 def create_label_with_info(parent, text, tooltip_text):
     frame = ctk.CTkFrame(parent, fg_color="transparent")
     
     label = ctk.CTkLabel(frame, text=text)
     label.pack(side="left")  # Using pack inside the frame is fine
+    label_index[text] = label
     
     if tooltip_text:
         info_icon = ctk.CTkLabel(frame, text="ⓘ", cursor="hand2", font=("Arial", 10))
@@ -83,76 +96,120 @@ def create_label_with_info(parent, text, tooltip_text):
     
     return frame
 
+# Readers and writers for each kind of input, keyed by the tag stored in entry_kinds
+def _get_date(widget, date_fmt):
+    dt = datetime.datetime.strptime(widget['cal'].get_date(), '%Y-%m-%d')
+    time_str = widget['time_combobox'].get()
+    return f"{dt.strftime(date_fmt)} {time_str}:00"
+
+def _get_tle(widget, date_fmt):
+    return (widget[0].get(), widget[1].get())
+
+def _get_value(widget, date_fmt):
+    return widget.get()
+
+def _get_dropdown(widget, date_fmt):
+    dropdown, mapping, _ = widget
+    return mapping[dropdown.get()]
+
+def _get_entry(widget, date_fmt):
+    val = widget.get()
+    # Whole numbers stay ints, anything else numeric becomes a float
+    try:
+        return int(val)
+    except ValueError:
+        pass
+    try:
+        return float(val)
+    except ValueError:
+        return val
+
+def _set_date(widget, value):
+    try:
+        # Parse the datetime string from config
+        dt = datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        # Update calendar widget
+        widget['cal'].selection_set(dt.date())
+        # Update time dropdown
+        time_str = dt.strftime("%H:%M")
+        widget['time_combobox'].set(time_str)
+    except ValueError as e:
+        print(f"Error parsing date: {e}")
+
+def _set_limit(widget, value):
+    widget.set(value)
+    toggle_limit_options()
+
+def _set_tle(widget, value):
+    for entry, line in zip(widget, value):
+        _set_entry(entry, line)
+
+def _set_value(widget, value):
+    if widget.get() != value:
+        widget.set(value)
+
+def _set_dropdown(widget, value):
+    # Find the display value that matches this config value
+    display_value = widget[2].get(value)
+    if display_value and widget[0].get() != display_value:
+        widget[0].set(display_value)
+
+def _set_entry(widget, value):
+    # Unchanged fields are left alone to avoid a delete/insert round-trip through Tcl
+    value = str(value)
+    if widget.get() != value:
+        widget.delete(0, tk.END)
+        widget.insert(0, value)
+
+ENTRY_GETTERS = {
+    "date": _get_date,
+    "tle": _get_tle,
+    "bool": _get_value,
+    "limit": _get_value,
+    "dropdown": _get_dropdown,
+    "entry": _get_entry,
+}
+
+ENTRY_SETTERS = {
+    "date": _set_date,
+    "tle": _set_tle,
+    "bool": _set_value,
+    "limit": _set_limit,
+    "dropdown": _set_dropdown,
+    "entry": _set_entry,
+}
+
 def set_values_from_config(config):
     for key, value in config.items():
         if key in entries:
-            widget = entries[key]
-            if key == "date_start":
-                try:
-                    # Parse the datetime string from config
-                    dt = datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-                    # Update calendar widget
-                    widget['cal'].selection_set(dt.date())
-                    # Update time dropdown
-                    time_str = dt.strftime("%H:%M")
-                    widget['time_combobox'].set(time_str)
-                except ValueError as e:
-                    print(f"Error parsing date: {e}")
-            elif key == "limit_option":
-                entries[key].set(value)
-                toggle_limit_options()
-            elif isinstance(widget, tuple) and key == "satellite_tle":
-                widget[0].delete(0, tk.END)
-                widget[0].insert(0, value[0])
-                widget[1].delete(0, tk.END)
-                widget[1].insert(0, value[1])
-            elif isinstance(widget, tk.BooleanVar):
-                widget.set(value)
-            elif isinstance(widget, tuple):  # Dropdown
-                # Find the display value that matches this config value
-                display_value = next((k for k,v in widget[1].items() if v == value), None)
-                if display_value:
-                    widget[0].set(display_value)
-            elif hasattr(widget, "delete"):  # Entry field
-                widget.delete(0, tk.END)
-                widget.insert(0, str(value))
+            ENTRY_SETTERS[entry_kinds[key]](entries[key], value)
+
+def collect_config(date_fmt='%Y-%m-%d'):
+    """Read every input widget once and return the config dict, with the start date in date_fmt"""
+    return {key: ENTRY_GETTERS[entry_kinds[key]](widget, date_fmt) for key, widget in entries.items()}
 
 def save_preset():
-    config = {}
-    for key, widget in entries.items():
-        if key == "date_start":
-            dt = datetime.datetime.strptime(widget['cal'].get_date(), '%Y-%m-%d')
-            time_str = widget['time_combobox'].get()
-            config[key] = f"{dt.strftime('%Y-%m-%d')} {time_str}:00"
-        elif isinstance(widget, tuple) and key == "satellite_tle":
-            config[key] = (widget[0].get(), widget[1].get())
-        elif isinstance(widget, tk.BooleanVar):
-            config[key] = widget.get()
-        elif isinstance(widget, tuple):
-            dropdown, mapping = widget
-            config[key] = mapping[dropdown.get()]
-        elif hasattr(widget, "get"):
-            val = widget.get()
-            try:
-                config[key] = float(val) if '.' in val or 'e' in val.lower() else int(val)
-            except ValueError:
-                config[key] = val
+    config = collect_config()
     
     file_path = filedialog.asksaveasfilename(
         defaultextension=".json",
         filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
     )
     if file_path:
-        with open(file_path, 'w') as f:
-            json.dump(config, f, indent=4)
+        # Encode once, write once
+        if orjson is not None:
+            data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(config, indent=4).encode("utf-8")
+        Path(file_path).write_bytes(data)
 
 def load_preset():
     file_path = filedialog.askopenfilename(
         filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
     )
     if file_path:
-        with open(file_path, 'r') as f:
-            config = json.load(f)
+        data = Path(file_path).read_bytes()
+        config = orjson.loads(data) if orjson is not None else json.loads(data)
         set_values_from_config(config)
 
 # Friendly names and tooltips
@@ -225,6 +282,9 @@ root = ctk.CTk()
 root.title("OpenSATQKD")
 root.geometry("1000x800")
 
+# Clicks anywhere close an open tooltip
+root.bind_all("<Button-1>", ToolTip.dispatch_click, add="+")
+
 # Create main container frames
 root.grid_rowconfigure(0, weight=2)  # 2/3 for inputs
 root.grid_rowconfigure(1, weight=1)  # 1/3 for output
@@ -240,6 +300,7 @@ scrollable_frame = ctk.CTkScrollableFrame(upper_frame)
 scrollable_frame.pack(fill="both", expand=True)
 
 entries = {}
+entry_kinds = {}  # Kind of input behind each entry: date, tle, bool, limit, dropdown or entry
 row = 0
 
 # Section titles
@@ -281,9 +342,13 @@ def make_dropdown(key, display_options):
     combobox = ctk.CTkOptionMenu(scrollable_frame, values=display_options)
     combobox.set(display_options[0])  
     combobox.grid(row=row, column=1)
-    entries[key] = (combobox, value_map)
+    entries[key] = (combobox, value_map, {v: k for k, v in value_map.items()})
+    entry_kinds[key] = "dropdown"
     return combobox
 
+# Start time choices in 15 minute steps (HH:MM)
+TIME_OPTIONS = [f"{hour:02}:{minute:02}" for hour in range(24) for minute in range(0, 60, 15)]
+
 def create_start_time_picker(parent_frame, tooltip_text):
     # Create a frame for the start time input
     start_time_frame = ctk.CTkFrame(parent_frame)
@@ -294,8 +359,7 @@ def create_start_time_picker(parent_frame, tooltip_text):
     cal.grid(row=0, column=0, padx=(5, 10))
 
     # Add Time Combobox (HH:MM format)
-    time_options = [f"{hour:02}:{minute:02}" for hour in range(24) for minute in range(0, 60, 15)]
-    time_combobox = ctk.CTkOptionMenu(start_time_frame, values=time_options)
+    time_combobox = ctk.CTkOptionMenu(start_time_frame, values=TIME_OPTIONS)
     time_combobox.set("12:00")  # Default time
     time_combobox.grid(row=0, column=1, padx=(10, 5))
 
@@ -374,13 +438,7 @@ def toggle_weather_dependent_fields():
         "aerosol_depth": entries["aerosol_depth"],
     }
     
-    label_mapping = {
-        "Climate Model": "climate_model",
-        "Precipitable Water Vapor (mm)": "precipitable_water",
-        "Ozone Column Depth (DU)": "ozone_depth",
-        "Ground Pressure (hPa)": "ground_pressure",
-        "Aerosol Depth": "aerosol_depth",
-    }
+    label_mapping = {field_info[key][0]: key for key in manual_weather_fields}
     
     # Update widgets and labels
     for label_text, field_key in label_mapping.items():
@@ -395,12 +453,7 @@ def toggle_weather_dependent_fields():
 
 def find_label_by_text(text):
     """Helper to find a label by its text content"""
-    for child in scrollable_frame.winfo_children():
-        if isinstance(child, ctk.CTkFrame):
-            for subchild in child.winfo_children():
-                if isinstance(subchild, ctk.CTkLabel) and subchild.cget("text") == text:
-                    return subchild
-    return None
+    return label_index.get(text)
                 
 def toggle_limit_options():
     """Toggle between qkd_time and max_range options"""
@@ -411,11 +464,11 @@ def toggle_limit_options():
     limit_fields = {
         "qkd_time": {
             "widget": entries["qkd_time"],
-            "label_text": "Effective QKD Time"
+            "label_text": field_info["qkd_time"][0]
         },
         "max_range": {
             "widget": entries["max_range"],
-            "label_text": "Maximum Slant Range (km)"
+            "label_text": field_info["max_range"][0]
         }
     }
     
@@ -456,6 +509,7 @@ for section, keys in sections.items():
                 'cal': start_time_frame.children['!calendar'],
                 'time_combobox': start_time_frame.children['!ctkoptionmenu']
             }
+            entry_kinds[key] = "date"
             row += 1
             
         elif key == "satellite_tle":
@@ -474,6 +528,7 @@ for section, keys in sections.items():
             entry2.insert(0, config_template[key][1])
             entry2.grid(row=row, column=1)
             entries[key] = (entry1, entry2)
+            entry_kinds[key] = "tle"
             row += 1
         elif key == "weather_auto":
             var = tk.BooleanVar(value=config_template[key])
@@ -488,6 +543,7 @@ for section, keys in sections.items():
                                     font=("Arial", 10))
             help_label.grid(row=row, column=1, sticky=tk.W, padx=(10,0))
             entries[key] = var
+            entry_kinds[key] = "bool"
             row += 1
         elif key == "limit_option":
             # Radio buttons for choosing which limit to use
@@ -515,6 +571,7 @@ for section, keys in sections.items():
             )
             range_radio.pack(side="left", padx=5)
             entries[key]=active_limit_option
+            entry_kinds[key] = "limit"
             row += 1
         else:
             label_text, tooltip = field_info[key]
@@ -530,7 +587,8 @@ for section, keys in sections.items():
                 combobox = ctk.CTkOptionMenu(scrollable_frame, values=list(climate_map.keys()))
                 combobox.set("Tropical")
                 combobox.grid(row=row, column=1)
-                entries[key] = (combobox, climate_map)
+                entries[key] = (combobox, climate_map, {v: k for k, v in climate_map.items()})
+                entry_kinds[key] = "dropdown"
             elif key in ["qkd_protocol", "two_universal", "cascade"]:
                 options = {
                     "qkd_protocol": ["Decoy_State", "BB84"],
@@ -543,6 +601,7 @@ for section, keys in sections.items():
                 entry.insert(0, config_template[key])
                 entry.grid(row=row, column=1)
                 entries[key] = entry
+                entry_kinds[key] = "entry"
 
             row += 1
 
@@ -553,80 +612,81 @@ toggle_limit_options()
 output_box = ctk.CTkTextbox(lower_frame, wrap="word")
 output_box.pack(side="left", fill="both", expand=True)
 
+# Validation bounds for the numeric fields - using +/- inf where appropriate
+NUMERIC_FIELD_BOUNDS = (
+    ("ground_latitude", -90, 90),  # Fixed bounds
+    ("ground_longitude", -180, 180),  # Fixed bounds
+    ("ground_altitude", 0, math.inf),  # Must be ≥ 0
+    ("receiving_telescope_aperture", 0.0001, math.inf),
+    ("detector_efficiency", 0, 1),  # Percentage (0-1)
+    ("optical_efficiency", 0, 1),
+    ("detector_maximum_count_rate", 0.0001, math.inf),
+    ("dark_count_rate", 0, math.inf),
+    ("sending_telescope_aperture", 0.0001, math.inf),
+    ("beam_divergence", 0.000000001, math.inf),
+    ("point_acc_min", 0.000000001, math.inf),
+    ("point_acc_max", 0.000000001, math.inf),
+    ("weak_coherent_pulse_rate", 0.0001, math.inf),
+    ("uplink_bandwidth", 0.0001, math.inf),
+    ("downlink_bandwidth", 0.0001, math.inf),
+    ("min_elevation_angle_start", 0, 90),  # Degrees (0-90)
+    ("min_elevation_angle_end", 0, 90),
+    ("photon_wavelength", 30, 20000),  # Nanometers (typical optical range)
+    ("signal_mean_photon_num", 0, 1),  # Photon number (0-1)
+    ("decoy_mean_photon_num", 0, 1),  # Photon number (0-1)
+    ("signal_prob", 0, 1),  # Probability (0-1)
+    ("decoy_prob", 0, 1),  # Probability (0-1)
+    ("time_window", 0.0001, math.inf),
+    ("depolarization_error", 0, 1),  # Error rate (0-1)
+    ("percentage_estimate_qber", 0, 1),  # Percentage (0-1)
+    ("precipitable_water", 0, math.inf),  # mm 
+    ("ozone_depth", 0, math.inf),  # Dobson units 
+    ("ground_pressure", 0, math.inf),  # hPa 
+    ("aerosol_depth", 0, math.inf), 
+    ("cloud_depth", 0, math.inf), 
+    ("qkd_time", 0, 1),
+    ("max_range", 0, math.inf),
+)
+
+# Only the field of the active limit option is validated
+BOUNDS_LIMIT_BY_TIME = tuple(b for b in NUMERIC_FIELD_BOUNDS if b[0] != "max_range")
+BOUNDS_LIMIT_BY_RANGE = tuple(b for b in NUMERIC_FIELD_BOUNDS if b[0] != "qkd_time")
+
+# Fields that are ignored when the weather is obtained automatically
+AUTO_WEATHER_FIELDS = frozenset({"precipitable_water", "ozone_depth", "ground_pressure", "aerosol_depth"})
+
+def _range_description(min_val, max_val):
+    # Format the range display nicely for infinite bounds
+    if min_val == -math.inf and max_val == math.inf:
+        return "any value"
+    elif min_val == -math.inf:
+        return f"≤ {max_val}"
+    elif max_val == math.inf:
+        return f"≥ {min_val}"
+    return f"between {min_val} and {max_val}"
+
+RANGE_ERRORS = {
+    name: f"{field_info[name][0]} must be {_range_description(min_val, max_val)}"
+    for name, min_val, max_val in NUMERIC_FIELD_BOUNDS
+}
+
 def validate_inputs(config):
     """Validate all input parameters and return error messages if any are invalid"""
     errors = []
-    
-    # Helper function to check if value is within range
-    def check_range(name, value, min_val, max_val):
-        # Handle infinite bounds
-        lower_ok = (min_val == -math.inf) or (value >= min_val)
-        upper_ok = (max_val == math.inf) or (value <= max_val)
-        
-        if not (lower_ok and upper_ok):
-            # Format the range display nicely for infinite bounds
-            range_str = ""
-            if min_val == -math.inf and max_val == math.inf:
-                range_str = "any value"
-            elif min_val == -math.inf:
-                range_str = f"≤ {max_val}"
-            elif max_val == math.inf:
-                range_str = f"≥ {min_val}"
-            else:
-                range_str = f"between {min_val} and {max_val}"
-                
-            errors.append(f"{field_info[name][0]} must be {range_str}")
-    
-    # Validate numeric fields - using +/- inf where appropriate
-    numeric_fields = {
-        "ground_latitude": (-90, 90),  # Fixed bounds
-        "ground_longitude": (-180, 180),  # Fixed bounds
-        "ground_altitude": (0, math.inf),  # Must be ≥ 0
-        "receiving_telescope_aperture": (0.0001, math.inf),
-        "detector_efficiency": (0, 1),  # Percentage (0-1)
-        "optical_efficiency": (0, 1),
-        "detector_maximum_count_rate": (0.0001, math.inf),
-        "dark_count_rate": (0, math.inf),
-        "sending_telescope_aperture": (0.0001, math.inf),
-        "beam_divergence": (0.000000001, math.inf),
-        "point_acc_min": (0.000000001, math.inf),
-        "point_acc_max": (0.000000001, math.inf),
-        "weak_coherent_pulse_rate": (0.0001, math.inf),
-        "uplink_bandwidth": (0.0001, math.inf),
-        "downlink_bandwidth": (0.0001, math.inf),
-        "min_elevation_angle_start": (0, 90),  # Degrees (0-90)
-        "min_elevation_angle_end": (0, 90),
-        "photon_wavelength": (30, 20000),  # Nanometers (typical optical range)
-        "signal_mean_photon_num": (0, 1),  # Photon number (0-1)
-        "decoy_mean_photon_num": (0, 1),  # Photon number (0-1)
-        "signal_prob": (0, 1),  # Probability (0-1)
-        "decoy_prob": (0, 1),  # Probability (0-1)
-        "time_window": (0.0001, math.inf),
-        "depolarization_error": (0, 1),  # Error rate (0-1)
-        "percentage_estimate_qber": (0, 1),  # Percentage (0-1)
-        "precipitable_water": (0, math.inf),  # mm 
-        "ozone_depth": (0, math.inf),  # Dobson units 
-        "ground_pressure": (0, math.inf),  # hPa 
-        "aerosol_depth": (0, math.inf), 
-        "cloud_depth": (0, math.inf), 
-        "qkd_time": (0, 1),
-        "max_range": (0, math.inf),
-    }
 
-    active_limit = active_limit_option.get()
-    if active_limit == "qkd_time":
-        numeric_fields.pop("max_range", None)
-    else:
-        numeric_fields.pop("qkd_time", None)
+    bounds = BOUNDS_LIMIT_BY_TIME if active_limit_option.get() == "qkd_time" else BOUNDS_LIMIT_BY_RANGE
     
-    for field, (min_val, max_val) in numeric_fields.items():
-        if config["weather_auto"] and field in ["precipitable_water", "ozone_depth", "ground_pressure", "aerosol_depth"]:
+    for field, min_val, max_val in bounds:
+        if config["weather_auto"] and field in AUTO_WEATHER_FIELDS:
             continue
         try:
             value = float(config[field])
-            check_range(field, value, min_val, max_val)
         except ValueError:
             errors.append(f"{field_info[field][0]} must be a valid number")
+            continue
+        # Float comparison handles the infinite bounds natively
+        if not (min_val <= value <= max_val):
+            errors.append(RANGE_ERRORS[field])
     
     # Special validations
     if config["signal_prob"] + config["decoy_prob"] > 1:
@@ -665,28 +725,17 @@ def show_error_dialog(errors):
                             command=error_window.destroy)
     ok_button.pack(pady=10)
 
+# Single background worker so only one simulation runs at a time
+simulation_executor = ThreadPoolExecutor(max_workers=1)
+
+# Output lines are gathered for this many milliseconds and shown with one insert
+OUTPUT_BATCH_MS = 50
+pending_output = []
+pending_output_lock = threading.Lock()
+
 def run_simulation():
     # First collect all inputs
-    config = {}
-    for key, widget in entries.items():
-        if key == "date_start":
-            dt = datetime.datetime.strptime(widget['cal'].get_date(), '%Y-%m-%d')
-            time_str = widget['time_combobox'].get()
-            config[key] = f"{dt.strftime('%d/%m/%Y')} {time_str}:00"
-        elif isinstance(widget, tuple) and key == "satellite_tle":
-            config[key] = (widget[0].get(), widget[1].get())
-        elif isinstance(widget, tk.BooleanVar):
-            config[key] = widget.get()
-        elif isinstance(widget, tuple):
-            dropdown, mapping = widget
-            config[key] = mapping[dropdown.get()]
-        elif hasattr(widget, "get"):
-            val = widget.get()
-            try:
-                # Try to convert to float if it looks like a number
-                config[key] = float(val) if '.' in val or 'e' in val.lower() else int(val)
-            except ValueError:
-                config[key] = val
+    config = collect_config('%d/%m/%Y')
 
     # Validate inputs before proceeding
     errors = validate_inputs(config)
@@ -700,25 +749,48 @@ def run_simulation():
     output_box.insert(tk.END, "Running simulation...\n")
     
     def task():
+        # Runs on the worker; every widget update is handed back to the Tk thread
         try:
-            result_generator = run_qkd_simulation(config)
-            for result in result_generator:
-                if isinstance(result, tuple) and result[0] == "sat_coords":
-                    _, satlat, satlon, elevation, ranges, photons = result
-                    show_satellite_map_with_animation(
-                        satlat, satlon, elevation, ranges,
-                        config["ground_latitude"], config["ground_longitude"], photons
-                    )
-                elif isinstance(result, str):
-                    output_box.insert(tk.END, result + "\n")
-                    output_box.yview(tk.END)
-                    root.update_idletasks()
+            for result in run_qkd_simulation(config):
+                if isinstance(result, str):
+                    queue_output_line(result)
+                else:
+                    drain_output()
+                    root.after(0, post_result, result, config)
         except Exception as e:
-            output_box.insert(tk.END, f"Error: {str(e)}\n")
+            queue_output_line(f"Error: {str(e)}")
         finally:
-            run_button.configure(state=tk.NORMAL)
+            root.after(0, lambda: run_button.configure(state=tk.NORMAL))
 
-    threading.Thread(target=task, daemon=True).start()
+    simulation_executor.submit(task)
+
+def queue_output_line(line):
+    """Queue a line of simulation output; the first line of a batch schedules the flush"""
+    with pending_output_lock:
+        pending_output.append(line)
+        if len(pending_output) > 1:
+            return
+    root.after(OUTPUT_BATCH_MS, drain_output)
+
+def drain_output():
+    """Move every queued output line to the text box with a single insert"""
+    with pending_output_lock:
+        lines = pending_output[:]
+        pending_output.clear()
+    if lines:
+        root.after(0, post_result, "\n".join(lines), None)
+
+def post_result(result, config):
+    """Show one result from the simulation generator (called on the Tk thread)"""
+    if isinstance(result, tuple) and result[0] == "sat_coords":
+        _, satlat, satlon, elevation, ranges, photons = result
+        show_satellite_map_with_animation(
+            satlat, satlon, elevation, ranges,
+            config["ground_latitude"], config["ground_longitude"], photons
+        )
+    elif isinstance(result, str):
+        output_box.insert(tk.END, result + "\n")
+        output_box.yview(tk.END)
 
 preset_frame = ctk.CTkFrame(upper_frame)
 preset_frame.pack(pady=5)
@@ -733,16 +805,8 @@ load_button.pack(side="left", padx=5)
 run_button = ctk.CTkButton(upper_frame, text="Run Simulation", command=run_simulation)
 run_button.pack(pady=5)
 
-def show_satellite_map_with_animation(satlat, satlon, elevation, ranges, ground_lat, ground_lon, photons):
-    """Display satellite animation on a map"""
-    try:
-        # Convert all NumPy arrays to lists
-        latlngs = list(zip(satlat.tolist(), satlon.tolist()))
-        elevations = elevation.tolist()
-        ranges = ranges.tolist()
-
-        # Create HTML with animation
-        html = f"""
+# Static map page; the track itself is fetched from data.json next to it
+MAP_PAGE_HTML = """
             <!DOCTYPE html>
             <html>
             <head>
@@ -752,7 +816,7 @@ def show_satellite_map_with_animation(satlat, satlon, elevation, ranges, ground_
                 <link rel="stylesheet" href="https://unpkg.com/leaflet@1.7.1/dist/leaflet.css" />
                 <script src="https://unpkg.com/leaflet@1.7.1/dist/leaflet.js"></script>
                 <style>
-                    #controls {{
+                    #controls {
                         position: absolute;
                         top: 10px;
                         left: 50%;
@@ -762,102 +826,140 @@ def show_satellite_map_with_animation(satlat, satlon, elevation, ranges, ground_
                         padding: 10px;
                         border-radius: 8px;
                         box-shadow: 0 0 5px rgba(0,0,0,0.3);
-                    }}
-                    #slider {{
+                    }
+                    #slider {
                         width: 300px;
-                    }}
+                    }
                 </style>
             </head>
             <body>
                 <div id="controls">
                     <button onclick="play()">▶ Play</button>
                     <button onclick="pause()">⏸ Pause</button>
-                    <input type="range" id="slider" min="0" max="{len(latlngs) - 1}" value="0" />
+                    <input type="range" id="slider" min="0" max="0" value="0" />
                 </div>
                 <div id="map" style="width: 100%; height: 100vh;"></div>
                 <script>
-                    var map = L.map('map').setView([{ground_lat}, {ground_lon}], 5);
+                    var map = L.map('map');
 
-                    L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+                    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
                         attribution: 'Map data © OpenStreetMap contributors'
-                    }}).addTo(map);
+                    }).addTo(map);
 
-                    // Ground station
-                    L.marker([{ground_lat}, {ground_lon}], {{icon: L.icon({{
-                        iconUrl: 'https://upload.wikimedia.org/wikipedia/commons/d/d5/P_satellite_dish.svg',
-                        iconSize: [32, 32]
-                    }})}}).addTo(map).bindPopup('Ground Station');
-
-                    var latlngs = {json.dumps(latlngs)};
-                    var elevations = {json.dumps(elevations)};
-                    var ranges = {json.dumps(ranges)};
-                    var photons = {json.dumps(photons.tolist())};
-                    var satIcon = L.icon({{
+                    var satIcon = L.icon({
                         iconUrl: 'https://upload.wikimedia.org/wikipedia/commons/1/1b/Satellite_of_GDAL.svg',
                         iconSize: [32, 32]
-                    }});
-                    var marker = L.marker(latlngs[0], {{icon: satIcon}}).addTo(map);
-                    var polyline = L.polyline(latlngs, {{color: 'red'}}).addTo(map);
+                    });
+
+                    var latlngs = [];
+                    var elevations = [];
+                    var ranges = [];
+                    var photons = [];
+                    var marker = null;
 
                     var i = 0;
                     var interval = null;
 
-                    function updateMarker(index) {{
+                    function updateMarker(index) {
                         marker.setLatLng(latlngs[index]);
                         marker.bindPopup("Elevation: " + elevations[index].toFixed(2) + "°<br>Range: " + ranges[index].toFixed(2) + " km<br>" +
         "Photons: " + parseInt(photons[index]).toLocaleString()).openPopup();
                         document.getElementById("slider").value = index;
-                    }}
+                    }
 
-                    function play() {{
-                        if (interval) return;
-                        interval = setInterval(() => {{
-                            if (i >= latlngs.length) {{
+                    function play() {
+                        if (interval || !marker) return;
+                        interval = setInterval(() => {
+                            if (i >= latlngs.length) {
                                 clearInterval(interval);
                                 interval = null;
                                 return;
-                            }}
+                            }
                             updateMarker(i);
                             i++;
-                        }}, 1000);
-                    }}
+                        }, 1000);
+                    }
 
-                    function pause() {{
+                    function pause() {
                         clearInterval(interval);
                         interval = null;
-                    }}
+                    }
 
-                    document.getElementById("slider").addEventListener("input", function(e) {{
+                    document.getElementById("slider").addEventListener("input", function(e) {
+                        if (!marker) return;
                         i = parseInt(e.target.value);
                         updateMarker(i);
-                    }});
-
-                    updateMarker(0);
+                    });
+
+                    fetch('data.json', {cache: 'no-store'}).then(r => r.json()).then(d => {
+                        latlngs = d.latlngs;
+                        elevations = d.elevations;
+                        ranges = d.ranges;
+                        photons = d.photons;
+
+                        map.setView(d.ground, 5);
+
+                        // Ground station
+                        L.marker(d.ground, {icon: L.icon({
+                            iconUrl: 'https://upload.wikimedia.org/wikipedia/commons/d/d5/P_satellite_dish.svg',
+                            iconSize: [32, 32]
+                        })}).addTo(map).bindPopup('Ground Station');
+
+                        document.getElementById("slider").max = latlngs.length - 1;
+                        marker = L.marker(latlngs[0], {icon: satIcon}).addTo(map);
+                        L.polyline(latlngs, {color: 'red'}).addTo(map);
+                        updateMarker(0);
+                    });
                 </script>
             </body>
             </html>
             """
 
-        # Write the HTML to ~/Documents/satellite_animation/index.html
-        output_dir = os.path.expanduser("~/Documents/satellite_animation")
-        os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, "index.html")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(html)
-
-        # Start a simple HTTP server
-        PORT = 8000
-
-        def serve_once():
-            os.chdir(output_dir)
-            handler = http.server.SimpleHTTPRequestHandler
-            with socketserver.TCPServer(("", PORT), handler) as httpd:
-                httpd.timeout = 10  # Optional: stops waiting if no request comes in
-                print(f"Serving once at http://localhost:{PORT}")
-                httpd.handle_request()  # Serve a single request and exit
-
-        threading.Thread(target=serve_once, daemon=True).start()
-        webbrowser.open(f"http://localhost:{PORT}")
+def _map_data_json(data):
+    """Encode the map data (a dict of NumPy arrays and floats) as JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, default=np.ndarray.tolist).encode("utf-8")
+
+# HTTP server for the map page, started by the first run that shows a map
+map_server = None
+
+def ensure_map_server(directory):
+    """Start the map server on a free local port if it is not running yet and return the port"""
+    global map_server
+    if map_server is None:
+        import functools
+        import http.server
+        handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+        map_server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=map_server.serve_forever, daemon=True).start()
+        print(f"Serving the map at http://127.0.0.1:{map_server.server_port}/")
+    return map_server.server_port
+
+def show_satellite_map_with_animation(satlat, satlon, elevation, ranges, ground_lat, ground_lon, photons):
+    """Display satellite animation on a map"""
+    # Only needed once a run finishes, so kept out of the GUI start-up path
+    import webbrowser
+
+    try:
+        # Write the page and its data to ~/Documents/satellite_animation
+        output_dir = Path(os.path.expanduser("~/Documents/satellite_animation"))
+        output_dir.mkdir(parents=True, exist_ok=True)
+        index_file = output_dir / "index.html"
+        if not index_file.exists() or index_file.read_text(encoding="utf-8") != MAP_PAGE_HTML:
+            index_file.write_text(MAP_PAGE_HTML, encoding="utf-8")
+        (output_dir / "data.json").write_bytes(_map_data_json({
+            "ground": [float(ground_lat), float(ground_lon)],
+            "latlngs": np.stack([satlat, satlon], axis=1),
+            # The page shows two decimals and whole photons, so nothing finer is written
+            "elevations": np.round(elevation, 2),
+            "ranges": np.round(ranges, 2),
+            "photons": np.rint(photons).astype(np.int64),
+        }))
+
+        # Later runs only overwrite data.json; the server started by the first one keeps serving it
+        port = ensure_map_server(str(output_dir))
+        webbrowser.open(f"http://127.0.0.1:{port}/")
 
     except Exception as e:
         print(f"Map generation failed: {e}")
@@ -1,10 +1,10 @@
+import io
 import socket
-import os
 import config_educ
-import pickle
-from utils.qkd_protocols import random_base_string, measure, discard_bits
+from qiskit import qpy
+from wire import MAX_DATAGRAM, pack_indices, unpack_indices, pack_bits, recv_payload
+from utils.qkd_protocols import random_base_string, measure, discard_bits, bitstring_to_array, array_to_bitstring, depolarizing_noise_model
 from utils.parameter_estimation import randomly_select_bits
-from qiskit_aer.noise import NoiseModel, depolarizing_error
 
 # Configuration
 host = '0.0.0.0'
@@ -13,12 +13,18 @@ server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 server_address = (host, port)
 server_socket.bind(server_address)
 
+# The circuit is too large for a datagram, so it arrives on a TCP side channel one port up
+circuit_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+circuit_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+circuit_socket.bind((host, port + 1))
+circuit_socket.listen(1)
+
 # Helper function to receive data from the satellite
-def receive_data():
-    """Receives data from the satellite and handles potential errors."""
+def receive_data(raw=False):
+    """Receives data from the satellite and handles potential errors; raw keeps the payload as bytes."""
     try:
-        data, client_address = server_socket.recvfrom(4096)
-        return data.decode('utf-8'), client_address
+        data, client_address = server_socket.recvfrom(MAX_DATAGRAM)
+        return (data if raw else data.decode('utf-8')), client_address
     except Exception as e:
         print(f"[ERROR] Failed to receive data: {e}")
         return None, None
@@ -37,18 +43,17 @@ ground_bases = random_base_string(config_educ.PHOTON_COUNT)
 datos, client_address = receive_data()
 print(f"\n📩 SATELLITE -> GROUND STATION: {datos}")
 
-# Load the quantum circuit
-with open("queue.pkl", "rb") as f:
-    circuit = pickle.load(f)
+# Receive the QPY-serialized quantum circuit
+connection, _ = circuit_socket.accept()
+with connection:
+    circuit = qpy.load(io.BytesIO(recv_payload(connection)))[0]
+circuit_socket.close()
 
 # Add depolarizing noise model
-noise_model = NoiseModel()
-error = depolarizing_error(config_educ.DEPOLARIZATION_ERROR, 1)
-noise_model.add_all_qubit_quantum_error(error, ["h", "x"])
+noise_model = depolarizing_noise_model(config_educ.DEPOLARIZATION_ERROR)
 
 # Measure circuit with noise
 ground_bitstring = measure(circuit, ground_bases, noise_model, verbose=True)
-os.remove("queue.pkl")
 
 print(f"\n🗝️ GROUND STATION Bitstring: {ground_bitstring}")
 
@@ -59,11 +64,11 @@ server_socket.sendto(ground_bases.encode('utf-8'), client_address)
 
 print(f"\n📤 GROUND STATION -> SATELLITE: Sent measurement bases")
 
-datos, client_address = receive_data()
+datos, client_address = receive_data(raw=True)
 print("\n📩 SATELLITE -> GROUND STATION: Received mismatched indices.")
 
-mismatched_indices = list(map(int, datos.split(', ')))
-ground_bitstring = discard_bits(ground_bitstring, mismatched_indices)
+mismatched_indices = unpack_indices(datos)
+ground_bitstring = array_to_bitstring(discard_bits(bitstring_to_array(ground_bitstring), mismatched_indices))
 
 print(f"\n✅ Sifted GROUND STATION Bitstring: {ground_bitstring}")
 
@@ -71,13 +76,14 @@ print(f"\n✅ Sifted GROUND STATION Bitstring: {ground_bitstring}")
 print("\n📊 PARAMETER ESTIMATION STEP")
 print("--------------------------------------------------")
 
-string_to_estimate_qber, indices_to_estimate_qber = randomly_select_bits(ground_bitstring, config_educ.QBER_SAMPLE_PERCENTAGE)
+bits_to_estimate_qber, indices_to_estimate_qber = randomly_select_bits(bitstring_to_array(ground_bitstring), config_educ.QBER_SAMPLE_PERCENTAGE)
+string_to_estimate_qber = array_to_bitstring(bits_to_estimate_qber)
 
-server_socket.sendto(string_to_estimate_qber.encode('utf-8'), client_address)
+server_socket.sendto(pack_bits(bits_to_estimate_qber), client_address)
 print(f"\n📤 GROUND STATION -> SATELLITE: Sent random bits for QBER estimation:\n{string_to_estimate_qber}")
 
 indices_str = ', '.join(map(str, indices_to_estimate_qber))
-server_socket.sendto(indices_str.encode('utf-8'), client_address)
+server_socket.sendto(pack_indices(indices_to_estimate_qber), client_address)
 print(f"\n📤 GROUND STATION -> SATELLITE: Sent their corresponding indices:\n{indices_str}")
 
 datos, client_address = receive_data()
@@ -85,8 +91,7 @@ qber = datos
 print(f"\n📩 SATELLITE -> GROUND STATION: Estimated QBER = {qber}")
 
 print("\n✂️  Removing revealed bits used in QBER estimation...")
-indices_to_remove = set(indices_to_estimate_qber)
-ground_bitstring = ''.join(bit for i, bit in enumerate(ground_bitstring) if i not in indices_to_remove)
+ground_bitstring = array_to_bitstring(discard_bits(bitstring_to_array(ground_bitstring), indices_to_estimate_qber))
 
 # Final Key
 print("\n🔐 FINAL SECRET KEY (GROUND STATION SIDE)")
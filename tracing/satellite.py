@@ -1,7 +1,9 @@
+import io
 import socket
 import config_educ
-import pickle
-from utils.qkd_protocols import random_base_string, random_bitstring, encode, discard_bits, get_mismatched_indices
+from qiskit import qpy
+from wire import MAX_DATAGRAM, pack_indices, unpack_indices, unpack_bits, send_payload
+from utils.qkd_protocols import random_base_string, random_bitstring, encode, discard_bits, get_mismatched_indices, bitstring_to_array, array_to_bitstring
 from utils.parameter_estimation import calculate_qber
 
 # Configuration
@@ -10,10 +12,10 @@ port = 11555
 client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 server_address = (host, port)
 
-def receive_data():
+def receive_data(raw=False):
     try:
-        data, address = client_socket.recvfrom(4096)
-        return data.decode('utf-8'), address
+        data, address = client_socket.recvfrom(MAX_DATAGRAM)
+        return (data if raw else data.decode('utf-8')), address
     except Exception as e:
         print(f"[{e}] Did you run Ground Station Script first?")
         exit(1)
@@ -33,8 +35,11 @@ satellite_bases = random_base_string(config_educ.PHOTON_COUNT)
 satellite_bitstring = random_bitstring(config_educ.PHOTON_COUNT)
 circuit = encode(satellite_bitstring, satellite_bases, verbose=True)
 
-with open("queue.pkl", "wb") as f:
-    pickle.dump(circuit, f)
+# Ship the circuit in QPY format over the ground station's TCP side channel
+buffer = io.BytesIO()
+qpy.dump(circuit, buffer)
+with socket.create_connection((host, port + 1)) as circuit_socket:
+    send_payload(circuit_socket, buffer.getvalue())
 
 client_socket.sendto("All photons sent".encode('utf-8'), server_address)
 print("\n📤 SATELLITE -> GROUND STATION: All photons sent.")
@@ -48,31 +53,30 @@ print("\n📥 GROUND STATION -> SATELLITE: Received measurement bases.")
 
 mismatched_indices = get_mismatched_indices(data, satellite_bases, verbose=True)
 indices_str = ', '.join(map(str, mismatched_indices))
-client_socket.sendto(indices_str.encode('utf-8'), server_address)
+client_socket.sendto(pack_indices(mismatched_indices), server_address)
 print(f"\n📤 SATELLITE -> GROUND STATION: Mismatched basis indices: {indices_str}")
 
-satellite_bitstring = discard_bits(satellite_bitstring, mismatched_indices)
+satellite_bitstring = array_to_bitstring(discard_bits(bitstring_to_array(satellite_bitstring), mismatched_indices))
 print(f"\n✅ Sifted SATELLITE bitstring: {satellite_bitstring}")
 
 # ────────────────────────────────
 print("\n📊 PARAMETER ESTIMATION STEP")
 print("--------------------------------------------------")
-data, server_address = receive_data()
+data, server_address = receive_data(raw=True)
 print("\n📥 GROUND STATION -> SATELLITE: Received random bits for QBER estimation.")
 
-data2, server_address = receive_data()
+data2, server_address = receive_data(raw=True)
 print("\n📥 GROUND STATION -> SATELLITE: Received corresponding indices.")
 
-indices_to_estimate_qber = list(map(int, data2.split(', ')))
-qber = calculate_qber(''.join([satellite_bitstring[i] for i in indices_to_estimate_qber]), indices_to_estimate_qber, data, verbose=True)
+indices_to_estimate_qber = unpack_indices(data2)
+qber = calculate_qber(bitstring_to_array(satellite_bitstring)[indices_to_estimate_qber], indices_to_estimate_qber, unpack_bits(data), verbose=True)
 
 client_socket.sendto(str(qber).encode('utf-8'), server_address)
 print(f"\n📤 SATELLITE -> GROUND STATION: Estimated QBER = {qber:.4f}")
 
 # Remove revealed bits
 print("\n✂️  Removing revealed bits for final key generation...")
-indices_to_remove = set(indices_to_estimate_qber)
-satellite_bitstring = ''.join(bit for i, bit in enumerate(satellite_bitstring) if i not in indices_to_remove)
+satellite_bitstring = array_to_bitstring(discard_bits(bitstring_to_array(satellite_bitstring), indices_to_estimate_qber))
 
 # Final Key
 print("\n🔐 FINAL SECRET KEY (SATELLITE SIDE)")
@@ -0,0 +1,51 @@
+"""
+Binary framing for the index lists and bit samples exchanged between the tracing scripts.
+"""
+import struct
+import numpy as np
+
+# Largest payload that fits in a single UDP datagram
+MAX_DATAGRAM = 65507
+
+# Every payload starts with its element count as a big-endian unsigned int
+_COUNT = struct.Struct('>I')
+
+def pack_indices(indices) -> bytes:
+    """Frame key indices as a count followed by big-endian int32 values."""
+    indices = np.asarray(indices, dtype='>i4')
+    return _COUNT.pack(indices.size) + indices.tobytes()
+
+def unpack_indices(payload: bytes) -> np.ndarray:
+    """Read back the indices framed by pack_indices."""
+    (count,) = _COUNT.unpack_from(payload)
+    return np.frombuffer(payload, dtype='>i4', count=count, offset=_COUNT.size).astype(np.intp)
+
+def pack_bits(bits: np.ndarray) -> bytes:
+    """Frame a uint8 array of 0/1 values as a count followed by the bits packed eight per byte."""
+    bits = np.asarray(bits, dtype=np.uint8)
+    return _COUNT.pack(bits.size) + np.packbits(bits).tobytes()
+
+def unpack_bits(payload: bytes) -> np.ndarray:
+    """Read back the bits framed by pack_bits as a uint8 array of 0/1 values."""
+    (count,) = _COUNT.unpack_from(payload)
+    return np.unpackbits(np.frombuffer(payload, dtype=np.uint8, offset=_COUNT.size), count=count)
+
+def send_payload(sock, payload: bytes) -> None:
+    """Send a length-prefixed payload over a stream socket."""
+    sock.sendall(_COUNT.pack(len(payload)) + payload)
+
+def _recv_exact(sock, size: int) -> bytes:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Connection closed before the payload was complete")
+        received += n
+    return bytes(buf)
+
+def recv_payload(sock) -> bytes:
+    """Receive a payload sent with send_payload."""
+    (size,) = _COUNT.unpack(_recv_exact(sock, _COUNT.size))
+    return _recv_exact(sock, size)
@@ -2,40 +2,45 @@ from external.cascade.key import Key
 from external.cascade.reconciliation import Reconciliation
 from external.cascade.mock_classical_channel import MockClassicalChannel
 from typing import Tuple
+import numpy as np
 
 def cascade(
-    alice_bitstring: str,
-    bob_bitstring: str,
+    alice_bitstring: np.ndarray,
+    bob_bitstring: np.ndarray,
     estimated_qber: float,
     protocol: str
-) -> Tuple[Key, float, int, int]:
+) -> Tuple[np.ndarray, float, int, int]:
     """
     Perform information reconciliation using the specified cascade variant (e.g., original, biconf, etc).
 
     Args:
-        alice_bitstring (str): Alice's key.
-        bob_bitstring (str): Bob's key.
+        alice_bitstring (np.ndarray): Alice's key as a uint8 array of 0/1 values.
+        bob_bitstring (np.ndarray): Bob's key as a uint8 array of 0/1 values.
         estimated_qber (float): Estimated Quantum Bit Error Rate.
         protocol (str): Name of the cascade protocol variant to use.
 
     Returns:
-        Tuple[Key, float, int, int]: A tuple containing:
-            - reconciled_key (Key): The corrected key shared between Alice and Bob.
+        Tuple[np.ndarray, float, int, int]: A tuple containing:
+            - reconciled_key (np.ndarray): The corrected key as a uint8 array of 0/1 values.
             - efficiency (float): Efficiency of the reconciliation process.
             - ask_parity_bits (int): Number of parity bits Alice sends.
             - reply_parity_bits (int): Number of parity bits Bob replies with.
     """
     try:
-        alice_key = Key(bitstring=alice_bitstring)
-        bob_key = Key(bitstring=bob_bitstring)
+        alice_key = Key.from_bits(np.asarray(alice_bitstring, dtype=np.uint8).tolist())
+        bob_key = Key.from_bits(np.asarray(bob_bitstring, dtype=np.uint8).tolist())
 
         channel = MockClassicalChannel(alice_key)
         reconciliation = Reconciliation(protocol, channel, bob_key, estimated_qber)
 
         reconciled_key = reconciliation.reconcile()
+        key_size = reconciled_key.get_size()
+        reconciled_bits = np.fromiter(
+            (reconciled_key.get_bit(i) for i in range(key_size)), dtype=np.uint8, count=key_size
+        )
 
         return (
-            reconciled_key,
+            reconciled_bits,
             reconciliation.stats.efficiency,
             reconciliation.stats.ask_parity_bits,
             reconciliation.stats.reply_parity_bits
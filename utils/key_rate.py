@@ -1,5 +1,17 @@
+import atexit
 import matlab.engine
 
+# MATLAB engine shared by every key-rate call; started on first use
+_ENG = None
+
+def _get_engine():
+    """Return the shared MATLAB engine, starting it on the first call."""
+    global _ENG
+    if _ENG is None:
+        _ENG = matlab.engine.start_matlab()
+        atexit.register(_ENG.quit)
+    return _ENG
+
 def bb84_key_rate(
     ec_efficiency: float,
     depolarization_error: float,
@@ -20,11 +32,11 @@ def bb84_key_rate(
     Returns:
         float: The secret key rate computed by the solver.
     """
-    eng = matlab.engine.start_matlab()
+    eng = _get_engine()
     
     try:
-        # Initialize QKD input object
-        eng.eval("qkdInput = QKDSolverInput();", nargout=0)
+        # Initialize QKD input object, dropping anything left by a previous call
+        script = ["clear qkdInput results;", "qkdInput = QKDSolverInput();"]
 
         # Add fixed parameters
         parameters = {
@@ -43,19 +55,21 @@ def bb84_key_rate(
             "tExp": -7
         }
 
-        for param, val in parameters.items():
-            eng.eval(f"qkdInput.addFixedParameter('{param}', {val});", nargout=0)
+        script += [f"qkdInput.addFixedParameter('{param}', {val});" for param, val in parameters.items()]
 
         # Attach modules
-        eng.eval("qkdInput.setDescriptionModule(QKDDescriptionModule(@BasicBB84LossyDescriptionFunc));", nargout=0)
-        eng.eval("qkdInput.setChannelModule(QKDChannelModule(@BasicBB84LossyChannelFunc));", nargout=0)
-        eng.eval("qkdInput.setKeyRateModule(QKDKeyRateModule(@BasicKeyRateFunc));", nargout=0)
-        eng.eval("qkdInput.setOptimizerModule(QKDOptimizerModule(@coordinateDescentFunc, struct('verboseLevel',0)));", nargout=0)
-        eng.eval("qkdInput.setMathSolverModule(QKDMathSolverModule(@FW2StepSolver, struct('initMethod', 1, 'maxIter', 10, 'maxGap', 1e-6, 'blockDiagonal', true)));", nargout=0)
-        eng.eval('qkdInput.setGlobalOptions(struct("errorHandling", 3, "verboseLevel", 0, "cvxSolver", "SDPT3", "cvxPrecision", "high"));', nargout=0)
-
-        # Run solver
-        eng.eval("results = MainIteration(qkdInput);", nargout=0)
+        script += [
+            "qkdInput.setDescriptionModule(QKDDescriptionModule(@BasicBB84LossyDescriptionFunc));",
+            "qkdInput.setChannelModule(QKDChannelModule(@BasicBB84LossyChannelFunc));",
+            "qkdInput.setKeyRateModule(QKDKeyRateModule(@BasicKeyRateFunc));",
+            "qkdInput.setOptimizerModule(QKDOptimizerModule(@coordinateDescentFunc, struct('verboseLevel',0)));",
+            "qkdInput.setMathSolverModule(QKDMathSolverModule(@FW2StepSolver, struct('initMethod', 1, 'maxIter', 10, 'maxGap', 1e-6, 'blockDiagonal', true)));",
+            'qkdInput.setGlobalOptions(struct("errorHandling", 3, "verboseLevel", 0, "cvxSolver", "SDPT3", "cvxPrecision", "high"));',
+        ]
+
+        # Run solver; the whole setup goes to MATLAB in a single eval
+        script.append("results = MainIteration(qkdInput);")
+        eng.eval(" ".join(script), nargout=0)
         key_rate = float(eng.eval("results.keyRate;"))
 
         return key_rate
@@ -63,9 +77,6 @@ def bb84_key_rate(
     except Exception as e:
         raise RuntimeError(f"Failed to compute key rate: {e}")
 
-    finally:
-        eng.quit()
-
 
 
 def decoy_key_rate(
@@ -94,10 +105,10 @@ def decoy_key_rate(
     Returns:
         float: The secret key rate computed by the solver.
     """
-    eng = matlab.engine.start_matlab()
+    eng = _get_engine()
 
     try:
-        eng.eval("qkdInput = QKDSolverInput();", nargout=0)
+        script = ["clear qkdInput results keyRateOptions solverOpts;", "qkdInput = QKDSolverInput();"]
 
         # Set fixed parameters
         params = {
@@ -120,34 +131,36 @@ def decoy_key_rate(
             "GROUP_decoys_3": 0.001  # vacuum decoy
         }
 
-        for param, value in params.items():
-            eng.eval(f"qkdInput.addFixedParameter('{param}', {value});", nargout=0)
+        script += [f"qkdInput.addFixedParameter('{param}', {value});" for param, value in params.items()]
 
         # Description and channel modules
-        eng.eval("qkdInput.setDescriptionModule(QKDDescriptionModule(@BasicBB84LossyDescriptionFunc));", nargout=0)
-        eng.eval("qkdInput.setChannelModule(QKDChannelModule(@BasicBB84WCPDecoyChannelFunc));", nargout=0)
+        script += [
+            "qkdInput.setDescriptionModule(QKDDescriptionModule(@BasicBB84LossyDescriptionFunc));",
+            "qkdInput.setChannelModule(QKDChannelModule(@BasicBB84WCPDecoyChannelFunc));",
+        ]
 
         # Key rate module with options
-        eng.eval('keyRateOptions = struct("decoyTolerance", 1e-14, "decoySolver", "SDPT3", "decoyForceSep", true);', nargout=0)
-        eng.eval("qkdInput.setKeyRateModule(QKDKeyRateModule(@BasicBB84WCPDecoyKeyRateFunc, keyRateOptions));", nargout=0)
+        script += [
+            'keyRateOptions = struct("decoyTolerance", 1e-14, "decoySolver", "SDPT3", "decoyForceSep", true);',
+            "qkdInput.setKeyRateModule(QKDKeyRateModule(@BasicBB84WCPDecoyKeyRateFunc, keyRateOptions));",
+        ]
 
         # Optimizer and solver
-        eng.eval("qkdInput.setOptimizerModule(QKDOptimizerModule(@coordinateDescentFunc, struct('verboseLevel',0)));", nargout=0)
-        eng.eval("solverOpts = struct('initMethod', 1, 'maxIter', 10, 'maxGap', 1e-6, 'blockDiagonal', true);", nargout=0)
-        eng.eval("qkdInput.setMathSolverModule(QKDMathSolverModule(@FW2StepSolver, solverOpts));", nargout=0)
+        script += [
+            "qkdInput.setOptimizerModule(QKDOptimizerModule(@coordinateDescentFunc, struct('verboseLevel',0)));",
+            "solverOpts = struct('initMethod', 1, 'maxIter', 10, 'maxGap', 1e-6, 'blockDiagonal', true);",
+            "qkdInput.setMathSolverModule(QKDMathSolverModule(@FW2StepSolver, solverOpts));",
+        ]
 
         # Global solver options
-        eng.eval('qkdInput.setGlobalOptions(struct("errorHandling", ErrorHandling.CatchWarn, "verboseLevel", 0, "cvxSolver", "SDPT3"));', nargout=0)
+        script.append('qkdInput.setGlobalOptions(struct("errorHandling", ErrorHandling.CatchWarn, "verboseLevel", 0, "cvxSolver", "SDPT3"));')
 
-        # Run the solver and retrieve result
-        eng.eval("results = MainIteration(qkdInput);", nargout=0)
+        # Run the solver in the same eval, then retrieve the result
+        script.append("results = MainIteration(qkdInput);")
+        eng.eval(" ".join(script), nargout=0)
         key_rate = float(eng.eval("results.keyRate;"))
 
         return key_rate
 
     except Exception as e:
         raise RuntimeError(f"Failed to compute decoy key rate: {e}")
-
-    finally:
-        eng.quit()
-
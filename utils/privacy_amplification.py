@@ -1,25 +1,53 @@
-from random import randint
-from cryptomite import Circulant
-from cryptomite import Toeplitz
+import secrets
+import numpy as np
 from cryptomite.utils import next_prime
 from typing import List
 
+def _cyclic_convolution(a: np.ndarray, b: np.ndarray, length: int) -> np.ndarray:
+    """
+    Cyclic convolution of two 0/1 vectors of size `length` computed with a real FFT.
+
+    Products of bits summed over at most `length` terms stay far below 2**53, so rounding
+    the float64 result recovers the exact integer counts.
+    """
+    spectrum = np.fft.rfft(a, length) * np.fft.rfft(b, length)
+    return np.rint(np.fft.irfft(spectrum, length)).astype(np.int64)
+
+def _as_bits(bits) -> np.ndarray:
+    """
+    Returns bits as a float64 array; '0'/'1' strings are converted in one pass over their bytes.
+    """
+    if isinstance(bits, str):
+        bits = np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')
+    return np.asarray(bits, dtype=np.float64)
+
 def toeplitz(alice_bitstring: str, output_length: int, seed: List[int]) -> List[int]:
     """
     Applies Toeplitz two universal hash function to extract a secure key from Alice's bitstring.
 
     Args:
-        alice_bitstring (str): The original bitstring from Alice (e.g., "011010").
+        alice_bitstring (str or np.ndarray): Alice's key as a "0"/"1" string or an array of 0/1 values.
         output_length (int): Desired length of the extracted key.
-        seed (List[int]): Seed used to generate the Toeplitz matrix.
+        seed (List[int] or np.ndarray): Seed used to generate the Toeplitz matrix.
 
     Returns:
         List[int]: Extracted secure key as a list of bits.
     """
-    bit_input = [int(bit) for bit in alice_bitstring]
+    bit_input = _as_bits(alice_bitstring)
+    seed_bits = _as_bits(seed)
+    n = len(bit_input)
+    assert len(seed_bits) == n + output_length - 1
+
+    # Same layout as cryptomite's NTT Toeplitz: the first output_length seed bits form the
+    # first column and the rest wrap around the end of the cyclic buffer.
+    length = 1 << (2 * n).bit_length()
+    column = np.zeros(length)
+    column[:output_length] = seed_bits[:output_length]
+    if n > 1:
+        column[length - (n - 1):] = seed_bits[output_length:]
 
-    hash_function = Toeplitz(len(bit_input), output_length)
-    return hash_function.extract(bit_input, seed)
+    conv_output = _cyclic_convolution(bit_input, column, length)
+    return (conv_output[:output_length] & 1).tolist()
 
 
 def circulant(alice_bitstring: str, output_length: int, seed: List[int]) -> List[int]:
@@ -27,28 +55,41 @@ def circulant(alice_bitstring: str, output_length: int, seed: List[int]) -> List
     Applies Circulant two universal hash function to extract a secure key from Alice's bitstring.
 
     Args:
-        alice_bitstring (str): The original bitstring from Alice (e.g., "011010").
+        alice_bitstring (str or np.ndarray): Alice's key as a "0"/"1" string or an array of 0/1 values.
         output_length (int): Desired length of the extracted key.
-        seed (List[int]): Seed used to generate the Circulant matrix.
+        seed (List[int] or np.ndarray): Seed used to generate the Circulant matrix.
 
     Returns:
         List[int]: Extracted secure key as a list of bits.
     """
-    seed_bits = [int(b) for b in seed] if isinstance(seed, str) else seed
+    seed_bits = _as_bits(seed)
     seed_length = len(seed_bits)
-    key_length = len(alice_bitstring)
+    key_bits = _as_bits(alice_bitstring)
+    key_length = len(key_bits)
 
-    # Pad Alice's bitstring with '0's if it's shorter than required
-    if seed_length > key_length + 1:
-        padding_length = seed_length - key_length - 1
-        alice_bitstring += '0' * padding_length
+    # Pad Alice's bits with 0s if the key is shorter than required, plus the zero bit
+    # cryptomite's NTT Circulant appends; all of it is written into one zeroed buffer.
+    n = max(seed_length, key_length + 1)
+    input_bits = np.zeros(n)
+    input_bits[:key_length] = key_bits
+    assert seed_length == n and n - 1 >= output_length
 
-    input_bits = [int(bit) for bit in alice_bitstring]
-    hash_function = Circulant(seed_length - 1, output_length)
-    
-    return hash_function.extract(input_bits, seed_bits)
+    # Same layout as cryptomite: reverse all but the first entry so the cyclic
+    # convolution yields the circulant matrix-vector product.
+    input_bits[1:] = input_bits[1:][::-1].copy()
 
-def toeplitz_seed(alice_bitstring: str, output_length: int) -> List[int]:
+    length = 1 << (2 * n - 2).bit_length()
+    conv_output = _cyclic_convolution(input_bits, seed_bits, length)
+    return ((conv_output[:output_length] + conv_output[n:n + output_length]) & 1).tolist()
+
+def _random_bits(length: int) -> np.ndarray:
+    """
+    Draws `length` uniformly random bits from the OS CSPRNG, a whole byte at a time.
+    """
+    random_bytes = np.frombuffer(secrets.token_bytes((length + 7) // 8), dtype=np.uint8)
+    return np.unpackbits(random_bytes, count=length)
+
+def toeplitz_seed(alice_bitstring: str, output_length: int) -> np.ndarray:
     """
     Generates a random seed for Toeplitz two universal hash function.
 
@@ -57,13 +98,13 @@ def toeplitz_seed(alice_bitstring: str, output_length: int) -> List[int]:
         output_length (int): Desired output length of the hashed key.
 
     Returns:
-        List[int]: A random binary seed of length (input_len + output_len - 1).
+        np.ndarray: A random binary seed (uint8 0/1 values) of length (input_len + output_len - 1).
     """
     seed_length = len(alice_bitstring) + output_length - 1
-    return [randint(0, 1) for _ in range(seed_length)]
+    return _random_bits(seed_length)
 
 
-def circulant_seed(alice_bitstring: str) -> List[int]:
+def circulant_seed(alice_bitstring: str) -> np.ndarray:
     """
     Generates a random seed for Circulant two universal hash function.
 
@@ -71,16 +112,7 @@ def circulant_seed(alice_bitstring: str) -> List[int]:
         alice_bitstring (str): Input bitstring from Alice.
 
     Returns:
-        List[int]: A random binary seed of length equal to the next prime after len(alice_bitstring) + 1.
+        np.ndarray: A random binary seed (uint8 0/1 values) of length equal to the next prime after len(alice_bitstring) + 1.
     """
     seed_length = next_prime(len(alice_bitstring) + 1)
-    return [randint(0, 1) for _ in range(seed_length)]
-
-
-def toeplitz_seed(alice_bitstring, output_length):
-   return [randint(0, 1) for _ in range(len(alice_bitstring)+output_length-1)]
- 
-def circulant_seed(alice_bitstring):
-   return [randint(0, 1) for _ in range(next_prime(len(alice_bitstring) + 1))]
-
- 
+    return _random_bits(seed_length)
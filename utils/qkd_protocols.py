@@ -1,4 +1,4 @@
-import random
+import os
 from typing import List, Tuple
 import numpy as np
 from qiskit import QuantumCircuit
@@ -8,22 +8,40 @@ from qiskit_aer.noise import (
     depolarizing_error,
 )
 import time
+import atexit
+from functools import lru_cache
 import multiprocessing
-from itertools import chain
-from concurrent.futures import ProcessPoolExecutor
 
 
-BASE_CHOICES = ['Z', 'X']
-BIT_CHOICES = ['0', '1']
+# BB84 circuits are unentangled product states: MPS keeps each qubit as its own tensor, so it scales
+# linearly in the qubit count, where Aer's automatic choice (stabilizer) is quadratic per shot
+AER_METHOD = "matrix_product_state"
+
+# ASCII codes indexed by a random 0/1 draw
+BASE_CHOICES = np.frombuffer(b'ZX', dtype=np.uint8)
+BIT_CHOICES = np.frombuffer(b'01', dtype=np.uint8)
+
+# Shared generator for the string helpers, reseeded in forked workers so they do not repeat the parent's stream
+_rng = np.random.default_rng()
+
+def _reseed_rng():
+    global _rng
+    _rng = np.random.default_rng()
+
+os.register_at_fork(after_in_child=_reseed_rng)
 
 def random_base_string(n: int) -> str:
     """Generate a random string of length n with measurement bases ('Z' or 'X')."""
-    return ''.join(random.choices(BASE_CHOICES, k=n))
+    return BASE_CHOICES[_rng.integers(0, 2, size=n, dtype=np.uint8)].tobytes().decode('ascii')
 
 def random_bitstring(n: int) -> str:
     """Generate a random bitstring of length n composed of '0' and '1'."""
-    return ''.join(random.choices(BIT_CHOICES, k=n))
+    return BIT_CHOICES[_rng.integers(0, 2, size=n, dtype=np.uint8)].tobytes().decode('ascii')
     
+def _indices_of(symbols: str, symbol: str) -> List[int]:
+    """Positions of one ASCII symbol in a string, found with a single vectorized compare."""
+    return np.flatnonzero(np.frombuffer(symbols.encode('ascii'), dtype=np.uint8) == ord(symbol)).tolist()
+
 def encode(bits: str, bases: str, verbose: bool = False) -> QuantumCircuit:
     """
     Encode a bitstring using the specified bases (Z or X) into a quantum circuit.
@@ -48,22 +66,40 @@ def encode(bits: str, bases: str, verbose: bool = False) -> QuantumCircuit:
         print(f"{'Photon':<8} | {'Bit':<5} | {'Basis':<10} | {'Quantum State Sent'}")
         print("-" * 65)
 
-    for i in range(n):
-        bit = bits[i]
-        basis = bases[i]
-
-        if verbose:
+        for i in range(n):
+            bit = bits[i]
+            basis = bases[i]
             state = "|+⟩" if basis == 'X' and bit == '0' else "|−⟩" if basis == 'X' else "|1⟩" if bit == '1' else "|0⟩"
             print(f"{i + 1:<8} | {bit:<5} | {'Z (⊕)' if basis == 'Z' else 'X (⊗)':<10} | {state}")
 
-        if bit == '1':
-            qc.x(i)
-
-        if basis == 'X':
-            qc.h(i)
+    # One broadcast call per gate type; every X precedes every H, as the per-qubit order requires
+    ones = _indices_of(bits, '1')
+    if ones:
+        qc.x(ones)
+    x_bases = _indices_of(bases, 'X')
+    if x_bases:
+        qc.h(x_bases)
 
     return qc
 
+def _measurement_circuit(alice_circuit: QuantumCircuit, bases: str, inplace: bool = False) -> QuantumCircuit:
+    """Append Bob's basis rotations and measurements to (a copy of, unless inplace) Alice's circuit."""
+    n = len(bases)
+    bob_circuit = alice_circuit if inplace else alice_circuit.copy()
+
+    # Apply Hadamard gates for X-basis measurements
+    x_bases = _indices_of(bases, 'X')
+    if x_bases:
+        bob_circuit.h(x_bases)
+
+    # Add measurement
+    bob_circuit.measure(range(n), range(n))
+    return bob_circuit
+
+def _memory_to_bitstring(memory: List[str]) -> str:
+    """Join per-shot Aer memory into one bitstring, reversing each shot to match qubit order."""
+    return ''.join(bitstring[::-1] for bitstring in memory)
+
 def measure(
     alice_circuit: QuantumCircuit,
     bases: str,
@@ -85,23 +121,12 @@ def measure(
         str: Measured bitstring.
     """
     n = len(bases)
-    bob_circuit = alice_circuit.copy()
-
-    # Apply Hadamard gates for X-basis measurements
-    for i in range(n):
-        if bases[i] == 'X':
-            bob_circuit.h(i)
-
-    # Add measurement
-    bob_circuit.measure(range(n), range(n))
+    bob_circuit = _measurement_circuit(alice_circuit, bases)
 
     # Simulate with noise
-    sim = AerSimulator(noise_model=noise_model)
+    sim = AerSimulator(method=AER_METHOD, noise_model=noise_model)
     result = sim.run(bob_circuit, shots=shots, memory=True).result()
-    memory = result.get_memory()  # List[str]
-
-    # Reverse each bitstring to match qubit order
-    measured_bits = ''.join(bit for bitstring in memory for bit in bitstring[::-1])
+    measured_bits = _memory_to_bitstring(result.get_memory())
 
     if verbose:
         print("\n📊 Measurement Results:")
@@ -116,6 +141,18 @@ def measure(
 
     return measured_bits
 
+@lru_cache(maxsize=16)
+def depolarizing_noise_model(error_rate: float) -> NoiseModel:
+    """
+    Noise model applying a single-qubit depolarizing error of the given rate to every H and X gate.
+
+    Cached per rate, so the returned model is shared and must not be modified.
+    """
+    noise_model = NoiseModel()
+    dep_error = depolarizing_error(error_rate, 1)
+    noise_model.add_all_qubit_quantum_error(dep_error, ["h", "x"])
+    return noise_model
+
 def simulate_bb84(N: int, error_rate: float, shots: int) -> Tuple[str, str, str, str]:
     """
     Simulate the BB84 quantum key distribution protocol.
@@ -141,9 +178,7 @@ def simulate_bb84(N: int, error_rate: float, shots: int) -> Tuple[str, str, str,
     alice_circuit = encode(alice_bitstring, alice_bases)
 
     # Add depolarizing noise model to the circuit
-    noise_model = NoiseModel()
-    dep_error = depolarizing_error(error_rate, 1)
-    noise_model.add_all_qubit_quantum_error(dep_error, ["h", "x"])
+    noise_model = depolarizing_noise_model(error_rate)
 
     # Simulate Bob's measurement
     bob_measurement_result = measure(alice_circuit, bob_bases, noise_model, shots)
@@ -151,132 +186,204 @@ def simulate_bb84(N: int, error_rate: float, shots: int) -> Tuple[str, str, str,
 
     return alice_bitstring * shots, alice_bases * shots, bob_bases * shots, bob_bitstring
 
-def parallel_bb84_simulation(repetitions: int, error: float, shots: int) -> Tuple[str, str, str, str]:
+def batch_simulate_bb84(N: int, error_rate: float, repetitions: int, shots: int) -> Tuple[str, str, str, str]:
     """
-    Run multiple BB84 simulations in parallel.
+    Simulate several independent BB84 rounds, submitting all of Bob's circuits as one Aer job.
 
     Args:
-        repetitions (int): Number of simulations to run.
-        error (float): Depolarizing error rate.
-        shots (int): Number of shots per simulation.
+        N (int): Number of photons (qubits) sent per round.
+        error_rate (float): Depolarizing error probability (0-1).
+        repetitions (int): Number of independent rounds.
+        shots (int): Number of simulation repetitions per round.
 
     Returns:
-        Tuple[str, str, str, str]: 
-            - Concatenated Alice bitstring,
-            - Concatenated Alice basis string,
-            - Concatenated Bob basis string,
-            - Concatenated Bob bitstring.
+        Tuple[str, str, str, str]: The rounds of simulate_bb84 concatenated:
+            - Alice's bitstring,
+            - Alice's basis choices,
+            - Bob's basis choices,
+            - Bob's bitstring.
     """
-    num_processes = max(multiprocessing.cpu_count() // 2, 1)
-    with multiprocessing.Pool(processes=num_processes) as pool:
-        results = pool.starmap(simulate_bb84, [(500, error, shots)] * repetitions)
+    alice_bitstrings, alice_bases, bob_bases, circuits = [], [], [], []
+    for _ in range(repetitions):
+        alice_bases.append(random_base_string(N))
+        bob_bases.append(random_base_string(N))
+        alice_bitstrings.append(random_bitstring(N))
+        # Alice's circuit is built here and never reused, so Bob's gates go straight onto it
+        circuits.append(_measurement_circuit(encode(alice_bitstrings[-1], alice_bases[-1]), bob_bases[-1], inplace=True))
+
+    noise_model = depolarizing_noise_model(error_rate)
+
+    # One job for every round; Aer spreads the experiments over its own threads
+    sim = AerSimulator(method=AER_METHOD, noise_model=noise_model, max_parallel_experiments=0)
+    result = sim.run(circuits, shots=shots, memory=True).result()
+
+    return (
+        ''.join(bits * shots for bits in alice_bitstrings),
+        ''.join(bases * shots for bases in alice_bases),
+        ''.join(bases * shots for bases in bob_bases),
+        ''.join(_memory_to_bitstring(result.get_memory(i)) for i in range(repetitions)),
+    )
+
+def sample_bb84(N: int, error_rate: float, rng: np.random.Generator = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sample BB84 detections directly from the outcome probabilities of the circuit model.
+
+    Every photon is an independent single-qubit product state, so the result of
+    simulate_bb84 can be drawn in closed form: each X or H gate (Alice's bit flip,
+    Alice's basis change, Bob's basis change) is followed by a depolarizing channel,
+    which leaves the qubit untouched with probability (1 - error_rate). When the
+    bases match, Bob's bit is flipped with probability (1 - (1 - error_rate)**gates) / 2;
+    when they do not, Bob's bit is uniformly random.
+
+    Args:
+        N (int): Number of detected photons.
+        error_rate (float): Depolarizing error probability (0-1).
+        rng (np.random.Generator, optional): Random generator to draw from; a fresh one if None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            - Alice's bits,
+            - Alice's basis choices (0 = Z, 1 = X),
+            - Bob's basis choices (0 = Z, 1 = X),
+            - Bob's bits,
+            all as uint8 arrays of length N.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    alice_bits, alice_bases, bob_bases = rng.integers(0, 2, size=(3, N), dtype=np.uint8)
+
+    noisy_gates = alice_bits + alice_bases + bob_bases
+    flip_prob = np.where(alice_bases == bob_bases, (1 - (1 - error_rate) ** noisy_gates) / 2, 0.5)
+    bob_bits = alice_bits ^ (rng.random(N) < flip_prob).astype(np.uint8)
+
+    return alice_bits, alice_bases, bob_bases, bob_bits
 
-    alice_bitstring = ''.join(chain.from_iterable(result[0] for result in results))
-    alice_bases = ''.join(chain.from_iterable(result[1] for result in results))
-    bob_bases = ''.join(chain.from_iterable(result[2] for result in results))
-    bob_bitstring = ''.join(chain.from_iterable(result[3] for result in results))
+def parallel_bb84_simulation(photons: int, error: float, rng: np.random.Generator = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simulate the detections of a BB84 pass.
 
-    return alice_bitstring, alice_bases, bob_bases, bob_bitstring
+    Args:
+        photons (int): Number of detected photons.
+        error (float): Depolarizing error rate.
+        rng (np.random.Generator, optional): Random generator to draw from; a fresh one if None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: 
+            - Alice bits,
+            - Alice bases,
+            - Bob bases,
+            - Bob bits.
+    """
+    return sample_bb84(photons, error, rng)
 
 
 def parallel_decoy_simulation(
-    circuit,
-    repetitions: int, 
+    photons: int, 
     error: float, 
-    num_dark: int, 
-    shots: int
-) -> Tuple[str, str, str, str]:
+    num_dark: int,
+    rng: np.random.Generator = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """
-    Run BB84 simulations in parallel and inject dark counts.
+    Simulate the detections of a decoy-state BB84 pass and inject dark counts.
 
     Args:
-        repetitions (int): Number of simulation runs.
+        photons (int): Number of detected signal photons, excluding dark counts.
         error (float): Depolarizing error rate.
-        num_dark (int): Number of dark count (false detections) to inject.
-        shots (int): Number of shots per simulation.
+        num_dark (int): Number of dark count (false detections) to inject on top of the
+            signal detections; the returned arrays have photons + num_dark entries.
+        rng (np.random.Generator, optional): Random generator to draw from; a fresh one if None.
 
     Returns:
-        Tuple[str, str, str, str]: 
-            - Combined Alice bitstring,
-            - Combined Alice basis string,
-            - Combined Bob basis string,
-            - Combined Bob bitstring, including decoys.
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: 
+            - Alice bits,
+            - Alice bases,
+            - Bob bases,
+            - Bob bits, including dark counts.
     """
-    with ProcessPoolExecutor() as executor:
-        # Submit all jobs
-        futures = [executor.submit(simulate_bb84, circuit, error, shots) for _ in range(repetitions)]
-        
-        # Gather results as they complete
-        results = [f.result() for f in futures]
+    if rng is None:
+        rng = np.random.default_rng()
+    results = sample_bb84(photons, error, rng)
 
-    # Flatten lists
-    alice_bitstring = list(chain.from_iterable(result[0] for result in results))
-    alice_bases = list(chain.from_iterable(result[1] for result in results))
-    bob_bases = list(chain.from_iterable(result[2] for result in results))
-    bob_bitstring = list(chain.from_iterable(result[3] for result in results))
+    # Inject dark count entries at random positions: uncorrelated bits and bases on both sides
+    total_length = photons + num_dark
+    is_dark = np.zeros(total_length, dtype=bool)
+    is_dark[rng.choice(total_length, num_dark, replace=False)] = True
 
-    # Inject decoy (dark count) entries at random positions
-    total_length = len(alice_bitstring)
-    insert_indices = sorted(random.sample(range(total_length + num_dark), num_dark))
+    injected = []
+    for values in results:
+        merged = np.empty(total_length, dtype=np.uint8)
+        merged[~is_dark] = values
+        merged[is_dark] = rng.integers(0, 2, num_dark, dtype=np.uint8)
+        injected.append(merged)
 
-    for idx in reversed(insert_indices):  # Reverse for stable insert
-        alice_bitstring.insert(idx, random.choice('01'))
-        alice_bases.insert(idx, random.choice('XZ'))
-        bob_bases.insert(idx, random.choice('XZ'))
-        bob_bitstring.insert(idx, random.choice('01'))
+    return tuple(injected)
 
-    return ''.join(alice_bitstring), ''.join(alice_bases), ''.join(bob_bases), ''.join(bob_bitstring)
 
-
-def get_mismatched_indices(alice_bases: str, bob_bases: str, verbose: bool = False) -> List[int]:
+def get_mismatched_indices(alice_bases: np.ndarray, bob_bases: np.ndarray, verbose: bool = False) -> np.ndarray:
     """
     Identify indices where Alice and Bob used different measurement bases.
 
     Parameters:
-        alice_bases (str): Alice's basis string (e.g., 'ZXXZ...').
-        bob_bases (str): Bob's basis string (e.g., 'ZXZX...').
+        alice_bases (np.ndarray or str): Alice's bases as a uint8 array (0 = Z, 1 = X) or a
+            basis string (e.g., 'ZXXZ...').
+        bob_bases (np.ndarray or str): Bob's bases, in the same representation as Alice's.
         verbose (bool): If True, print a comparison table.
 
     Returns:
-        List[int]: Indices where the bases do not match.
+        np.ndarray: Indices where the bases do not match.
     """
     if len(alice_bases) != len(bob_bases):
         raise ValueError("Alice's and Bob's basis strings must be of equal length.")
 
-    mismatched = []
+    if isinstance(alice_bases, str):
+        alice_codes = np.frombuffer(alice_bases.encode('ascii'), dtype=np.uint8)
+    else:
+        alice_codes = np.asarray(alice_bases)
+    if isinstance(bob_bases, str):
+        bob_codes = np.frombuffer(bob_bases.encode('ascii'), dtype=np.uint8)
+    else:
+        bob_codes = np.asarray(bob_bases)
+
+    mismatched = np.flatnonzero(alice_codes != bob_codes)
 
     if verbose:
         print("\n📊 Basis Comparison:")
         print("══════════════════════════════════════════════════")
         print(f"{'Index':<6} {'Ground':<8} {'Satellite':<8} {'Match'}")
         print("-" * 32)
-
-    for i, (a, b) in enumerate(zip(alice_bases, bob_bases)):
-        if a != b:
-            mismatched.append(i)
-        if verbose:
+        for i, (a, b) in enumerate(zip(alice_bases, bob_bases)):
             match_symbol = '✔' if a == b else '❌'
-            print(f"{i:<6} {a:<8} {b:<8} {match_symbol}")
+            print(f"{i:<6} {str(a):<8} {str(b):<8} {match_symbol}")
 
     return mismatched
 
-def discard_bits(bitstring: str, mismatched_indices: List[int]) -> str:
+def discard_bits(bits: np.ndarray, mismatched_indices: np.ndarray) -> np.ndarray:
     """
-    Remove bits from a bitstring at the specified mismatched indices.
+    Remove bits from a key at the specified mismatched indices.
 
     Parameters:
-        bitstring (str): The original bitstring (e.g., '010110').
-        mismatched_indices (List[int]): Indices to be discarded.
+        bits (np.ndarray): The original key as a uint8 array of 0/1 values.
+        mismatched_indices (np.ndarray): Indices to be discarded.
 
     Returns:
-        str: A new bitstring with the mismatched bits removed.
+        np.ndarray: A new key with the mismatched bits removed.
     """
-    mismatched_set = set(mismatched_indices)
+    mismatched_indices = np.asarray(mismatched_indices, dtype=np.intp)
 
-    if not all(0 <= i < len(bitstring) for i in mismatched_set):
+    if mismatched_indices.size and (mismatched_indices.min() < 0 or mismatched_indices.max() >= len(bits)):
         raise ValueError("Mismatched indices contain out-of-range values.")
 
-    return ''.join(bit for i, bit in enumerate(bitstring) if i not in mismatched_set)
+    keep = np.ones(len(bits), dtype=bool)
+    keep[mismatched_indices] = False
+    return bits[keep]
+
+def bitstring_to_array(bitstring: str) -> np.ndarray:
+    """Convert a string of '0'/'1' characters into a uint8 array of 0/1 values."""
+    return np.frombuffer(bitstring.encode('ascii'), dtype=np.uint8) - ord('0')
+
+def array_to_bitstring(bits: np.ndarray) -> str:
+    """Convert a uint8 array of 0/1 values into a string of '0'/'1' characters."""
+    return (np.asarray(bits, dtype=np.uint8) + ord('0')).tobytes().decode('ascii')
 
 def simulate_with_timeout(circuit, error, shots, repetitions, num_dark):
     """
@@ -284,25 +391,49 @@ def simulate_with_timeout(circuit, error, shots, repetitions, num_dark):
     
     This function is separated to be compatible with multiprocessing.
     """
-    results = [simulate_bb84(circuit, error, shots) for _ in range(repetitions)]
-
-    # Flatten lists
-    alice_bitstring = list(chain.from_iterable(result[0] for result in results))
-    alice_bases = list(chain.from_iterable(result[1] for result in results))
-    bob_bases = list(chain.from_iterable(result[2] for result in results))
-    bob_bitstring = list(chain.from_iterable(result[3] for result in results))
-
-    # Inject decoy (dark count) entries at random positions
-    total_length = len(alice_bitstring)
-    insert_indices = sorted(random.sample(range(total_length + num_dark), num_dark))
-
-    for idx in reversed(insert_indices):  # Reverse for stable insert
-        alice_bitstring.insert(idx, random.choice('01'))
-        alice_bases.insert(idx, random.choice('XZ'))
-        bob_bases.insert(idx, random.choice('XZ'))
-        bob_bitstring.insert(idx, random.choice('01'))
-
-    return ''.join(alice_bitstring), ''.join(alice_bases), ''.join(bob_bases), ''.join(bob_bitstring)
+    results = batch_simulate_bb84(circuit, error, repetitions, shots)
+
+    # Inject decoy (dark count) entries at random positions, scattering every string in one pass
+    total_length = len(results[0]) + num_dark
+    is_dark = np.zeros(total_length, dtype=bool)
+    is_dark[_rng.choice(total_length, num_dark, replace=False)] = True
+
+    injected = []
+    for values, choices in zip(results, (BIT_CHOICES, BASE_CHOICES, BASE_CHOICES, BIT_CHOICES)):
+        merged = np.empty(total_length, dtype=np.uint8)
+        merged[~is_dark] = np.frombuffer(values.encode('ascii'), dtype=np.uint8)
+        merged[is_dark] = choices[_rng.integers(0, 2, num_dark, dtype=np.uint8)]
+        injected.append(merged.tobytes().decode('ascii'))
+
+    return tuple(injected)
+
+# Benchmark worker pool, kept alive across calls so workers import Aer and build noise models only once
+_BENCH_POOL = None
+
+def _init_bench_worker(error: float):
+    """Warm up a benchmark worker by building the noise model its tasks will reuse."""
+    depolarizing_noise_model(error)
+
+def _get_bench_pool(error: float):
+    global _BENCH_POOL
+    if _BENCH_POOL is None:
+        _BENCH_POOL = multiprocessing.Pool(
+            processes=max(multiprocessing.cpu_count() // 2, 1),
+            initializer=_init_bench_worker,
+            initargs=(error,),
+        )
+    return _BENCH_POOL
+
+@atexit.register
+def _close_bench_pool(terminate: bool = False):
+    global _BENCH_POOL
+    if _BENCH_POOL is not None:
+        if terminate:
+            _BENCH_POOL.terminate()
+        else:
+            _BENCH_POOL.close()
+        _BENCH_POOL.join()
+        _BENCH_POOL = None
 
 def bench_parallel_decoy_simulation(
     circuit,
@@ -331,7 +462,7 @@ def bench_parallel_decoy_simulation(
     """
     
 
-    pool = multiprocessing.Pool(processes=max(multiprocessing.cpu_count() // 2, 1))
+    pool = _get_bench_pool(error)
     result = pool.apply_async(simulate_with_timeout, (circuit, error, shots, repetitions, num_dark))
 
     try:
@@ -339,10 +470,8 @@ def bench_parallel_decoy_simulation(
         return result.get(timeout=timeout)  # This will raise TimeoutError if it exceeds the limit
     except multiprocessing.TimeoutError:
         print(f"Simulation exceeded the time limit of {timeout} seconds. Aborting.")
-    finally:
-        pool.close()
-        pool.terminate()
-        pool.join()
+        # The stuck worker cannot be cancelled, so drop the pool; the next call starts a fresh one
+        _close_bench_pool(terminate=True)
         return '', '', '', ''  # Return empty results to indicate failure
 
 
@@ -1,10 +1,64 @@
 import datetime
+from functools import lru_cache
 from typing import Tuple
 import numpy as np
 from datetime import timedelta
 from passpredict import Location, Observer, SGP4Propagator, TLE
 from passpredict.observers import Observer
 
+def _hashable_tle(two_line_element):
+    """
+    Return the TLE in a form usable as a cache key: a string as is, a list of lines (as loaded
+    from a JSON preset) as a tuple.
+    """
+    if isinstance(two_line_element, str):
+        return two_line_element
+    return tuple(two_line_element)
+
+@lru_cache(maxsize=16)
+def _propagator(two_line_element: str) -> SGP4Propagator:
+    """
+    Build (once per TLE) the SGP4 propagator shared by pass prediction and pass details.
+    """
+    tle = TLE(0, two_line_element, "QKD")
+    return SGP4Propagator.from_tle(tle)
+
+@lru_cache(maxsize=16)
+def _location(observer_name: str, observer_lat: float, observer_long: float, observer_alt: float) -> Location:
+    """
+    Build (once per ground station) the passpredict location, which precomputes its ECEF position.
+    """
+    return Location(observer_name, observer_lat, observer_long, observer_alt)
+
+@lru_cache(maxsize=64)
+def _next_pass(
+    observer_name: str,
+    observer_lat: float,
+    observer_long: float,
+    observer_alt: float,
+    two_line_element: str,
+    min_elevation: float,
+    date_start: datetime.datetime
+):
+    """
+    Run the brute-force pass search once per set of arguments and keep the passpredict result.
+    """
+    location = _location(observer_name, observer_lat, observer_long, observer_alt)
+
+    satellite = _propagator(two_line_element)
+    observer = Observer(location, satellite)
+    date_end = date_start + timedelta(days=1)
+
+    return observer.next_pass(
+        date_start, 
+        limit_date=date_end, 
+        aos_at_dg=min_elevation, 
+        tol=0.1, 
+        visible_only=False,
+        method='brute',
+        time_step=5
+    )
+
 def predict_pass(
     observer_name: str,
     observer_lat: float,
@@ -22,7 +76,7 @@ def predict_pass(
         observer_lat (float): Latitude of the observer in degrees.
         observer_long (float): Longitude of the observer in degrees.
         observer_alt (float): Altitude of the observer in meters.
-        two_line_element (str): Satellite TLE string.
+        two_line_element (str or list): Satellite TLE string, or its lines.
         min_elevation (float): Minimum elevation angle (degrees) for a valid pass.
         date_start (datetime): Start date and time to begin pass prediction.
 
@@ -31,30 +85,138 @@ def predict_pass(
             - Acquisition of signal (AOS) time,
             - Loss of signal (LOS) time,
             - Duration of the pass in seconds.
+
+    Results are memoized on the (hashable) arguments, so parameter sweeps that keep the
+    satellite, ground station and date fixed only propagate the orbit once.
     """
-    location = Location(observer_name, observer_lat, observer_long, observer_alt)
+    overpass = _next_pass(
+        observer_name, observer_lat, observer_long, observer_alt,
+        _hashable_tle(two_line_element), min_elevation, date_start
+    )
 
-    tle = TLE(0, two_line_element, "QKD")
-    satellite = SGP4Propagator.from_tle(tle)
-    observer = Observer(location, satellite)
-    date_end = date_start + timedelta(days=1)
+    aos_time = overpass.aos.dt
+    los_time = aos_time + timedelta(seconds=overpass.duration)
 
+    return aos_time, los_time, overpass.duration
 
+def _elevation_crossing(
+    observer: Observer,
+    t_below: datetime.datetime,
+    t_above: datetime.datetime,
+    threshold: float,
+    tol: float = 0.1
+) -> datetime.datetime:
+    """
+    Bisect for the time the satellite elevation crosses `threshold` (degrees) between a time
+    below it and a time above it. Works for both the rising and the setting side of a pass.
+    """
+    while abs((t_above - t_below).total_seconds()) > tol:
+        midpoint = t_below + (t_above - t_below) / 2
+        if observer.elevation(midpoint) >= threshold:
+            t_above = midpoint
+        else:
+            t_below = midpoint
+    return t_above
 
-    overpass = observer.next_pass(
-        date_start, 
-        limit_date=date_end, 
-        aos_at_dg=min_elevation, 
-        tol=0.1, 
-        visible_only=False,
-        method='brute',
-        time_step=5
+def predict_pass_window(
+    observer_name: str,
+    observer_lat: float,
+    observer_long: float,
+    observer_alt: float,
+    two_line_element: str,
+    min_elevation_start: float,
+    min_elevation_end: float,
+    date_start: datetime.datetime
+) -> Tuple[datetime.datetime, datetime.datetime]:
+    """
+    Predict the communication window of the next pass with separate start and end elevation
+    thresholds, using a single orbit sweep.
+
+    The pass is searched once at the lower of the two thresholds; the crossing of the higher
+    threshold is then located inside that pass by bisection on the elevation.
+
+    Args:
+        observer_name (str): Name of the observer location.
+        observer_lat (float): Latitude of the observer in degrees.
+        observer_long (float): Longitude of the observer in degrees.
+        observer_alt (float): Altitude of the observer in meters.
+        two_line_element (str or list): Satellite TLE string, or its lines.
+        min_elevation_start (float): Elevation angle (degrees) at which communication starts.
+        min_elevation_end (float): Elevation angle (degrees) at which communication ends.
+        date_start (datetime): Start date and time to begin pass prediction.
+
+    Returns:
+        Tuple[datetime, datetime]: Start and end time of the communication window.
+    """
+    return _predict_pass_window(
+        observer_name, observer_lat, observer_long, observer_alt,
+        _hashable_tle(two_line_element), min_elevation_start, min_elevation_end, date_start
     )
 
+@lru_cache(maxsize=64)
+def _predict_pass_window(
+    observer_name: str,
+    observer_lat: float,
+    observer_long: float,
+    observer_alt: float,
+    two_line_element: str,
+    min_elevation_start: float,
+    min_elevation_end: float,
+    date_start: datetime.datetime
+) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Memoized body of predict_pass_window; `two_line_element` must be hashable."""
+    low_elevation = min(min_elevation_start, min_elevation_end)
+    overpass = _next_pass(
+        observer_name, observer_lat, observer_long, observer_alt,
+        two_line_element, low_elevation, date_start
+    )
     aos_time = overpass.aos.dt
     los_time = aos_time + timedelta(seconds=overpass.duration)
+    tca_time = overpass.tca.dt
 
-    return aos_time, los_time, overpass.duration
+    location = _location(observer_name, observer_lat, observer_long, observer_alt)
+    observer = Observer(location, _propagator(two_line_element))
+
+    if min_elevation_start == low_elevation:
+        start_time = aos_time
+    elif overpass.tca.elevation >= min_elevation_start:
+        start_time = _elevation_crossing(observer, aos_time, tca_time, min_elevation_start)
+    else:
+        # The pass never rises to the start threshold: fall back to a dedicated search
+        start_time, _, _ = predict_pass(
+            observer_name, observer_lat, observer_long, observer_alt,
+            two_line_element, min_elevation_start, date_start
+        )
+
+    if min_elevation_end == low_elevation:
+        end_time = los_time
+    elif overpass.tca.elevation >= min_elevation_end:
+        end_time = _elevation_crossing(observer, los_time, tca_time, min_elevation_end)
+    else:
+        _, end_time, _ = predict_pass(
+            observer_name, observer_lat, observer_long, observer_alt,
+            two_line_element, min_elevation_end, date_start
+        )
+
+    return start_time, end_time
+
+def _ecef_to_lat_lon(ecef_km: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Geodetic latitude and longitude (degrees) of ECEF positions (km, shape (n, 3)), with the
+    same WGS-84 closed-form conversion passpredict applies to satellite subpoints.
+    """
+    a = 6378.1370
+    b = 6356.752314
+    x, y, z = ecef_km[:, 0], ecef_km[:, 1], ecef_km[:, 2]
+
+    p = np.hypot(x, y)
+    theta = np.arctan(z * a / (p * b))
+    esq = 1.0 - (b / a) ** 2
+    epsq = (a / b) ** 2 - 1.0
+
+    latitude = np.arctan((z + epsq * b * np.sin(theta) ** 3) / (p - esq * a * np.cos(theta) ** 3))
+    longitude = np.arctan2(y, x)
+    return np.degrees(latitude), np.degrees(longitude)
 
 def pass_details(
     observer_name: str,
@@ -73,7 +235,7 @@ def pass_details(
         observer_lat (float): Latitude of the observer in degrees.
         observer_long (float): Longitude of the observer in degrees.
         observer_alt (float): Altitude of the observer in meters.
-        two_line_element (str): TLE string (two lines concatenated or split).
+        two_line_element (str or list): TLE string (two lines concatenated or split), or its lines.
         pass_start (datetime): Start time of satellite pass.
         duration_comm (int): Duration of the communication window in seconds.
 
@@ -83,26 +245,47 @@ def pass_details(
             - elevations (np.ndarray): Elevation angles in degrees.
             - latitudes (np.ndarray): Satellite latitudes during the pass.
             - longitudes (np.ndarray): Satellite longitudes during the pass.
+
+    Results are memoized and shared between calls, so the returned arrays are read-only.
     """
-    tle = TLE(0, two_line_element, "QKD")
-    satellite = SGP4Propagator.from_tle(tle)
-    location = Location(observer_name, observer_lat, observer_long, observer_alt)
-    observer = Observer(location, satellite)
+    return _pass_details(
+        observer_name, observer_lat, observer_long, observer_alt,
+        _hashable_tle(two_line_element), pass_start, duration_comm
+    )
 
+@lru_cache(maxsize=16)
+def _pass_details(
+    observer_name: str,
+    observer_lat: float,
+    observer_long: float,
+    observer_alt: float,
+    two_line_element: str,
+    pass_start: datetime.datetime,
+    duration_comm: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Memoized body of pass_details; `two_line_element` must be hashable."""
+    satellite = _propagator(two_line_element)
+    location = _location(observer_name, observer_lat, observer_long, observer_alt)
+
+    # One SGP4 propagation per second; everything else is derived from these ECEF positions
     time_step = datetime.timedelta(seconds=1)
-    satpos = satellite.get_position_detail(pass_start, duration_comm, time_step)
-
-    ranges = []
-    elevation = []
-    longitude = satpos.longitude
-    latitude = satpos.latitude
-    
-    for i in range(duration_comm):
-        pt = observer.point(pass_start, visibility=True, aos_at_dg=0)
-        ranges = ranges + [pt.range]
-        elevation = elevation + [pt.elevation]
-        pass_start = pass_start + time_step
-    return (np.array(ranges, dtype=float), np.array(elevation, dtype=float), latitude, longitude)
+    sat_ecef = np.array([
+        satellite.get_only_position(pass_start + k * time_step) for k in range(duration_comm)
+    ], dtype=float).reshape(-1, 3)
+
+    # Range and elevation from the slant vector and the observer's local vertical, as passpredict's razel
+    lat_rad, lon_rad = np.radians(observer_lat), np.radians(observer_long)
+    up = np.array([np.cos(lat_rad) * np.cos(lon_rad), np.cos(lat_rad) * np.sin(lon_rad), np.sin(lat_rad)])
+    slant = sat_ecef - location.recef
+    ranges = np.linalg.norm(slant, axis=1)
+    elevation = np.degrees(np.arcsin(slant @ up / ranges))
+
+    latitude, longitude = _ecef_to_lat_lon(sat_ecef)
+
+    details = (ranges, elevation, latitude, longitude)
+    for array in details:
+        array.setflags(write=False)
+    return details
 
 def keep_percentage_symmetrically(arr, pct):
         k = int(round(len(arr) * pct))  # number of elements to keep
@@ -5,7 +5,7 @@ from scipy.special import erfinv
 from scipy.integrate import quad
 from libradtranpy import libsimulateVisible
 from concurrent.futures import ThreadPoolExecutor
-import math
+from functools import lru_cache
 
 from utils.weather import obtain_atmospheric_parameters
 
@@ -24,7 +24,21 @@ def simulate_for_zenith(zenith, water_vapour, ozone, pressure, aod_500, angstrom
     )
     return wl, transm
 
-def atmospheric_transmittance(auto, model: str, date, lat, lon, alt, wav, zenith_arr, water_vapour, ozone, pressure, aod_500, cloud, angstrom_exponent=1.4) -> float:
+# Zenith spacing (degrees) of the radiative-transfer grid the per-sample transmittance is interpolated from
+ZENITH_GRID_STEP = 1.0
+
+@lru_cache(maxsize=4096)
+def _transmittance_at_airmass(airmass, water_vapour, ozone, pressure, aod_500, angstrom_exponent, cloud, model, alt, wav):
+    wl, transm = simulate_for_zenith(airmass, water_vapour, ozone, pressure, aod_500, angstrom_exponent, cloud, model, alt)
+    return transm[np.argmin(np.abs(wl - wav))]
+
+def atmospheric_transmittance(auto, model: str, date, lat, lon, alt, wav, zenith_arr, water_vapour, ozone, pressure, aod_500, cloud, angstrom_exponent=1.4, cos_zenith=None) -> float:
+    """
+    Atmospheric transmittance at wavelength `wav` for each zenith angle of the pass.
+
+    LibRadtran is only run on a fixed zenith grid (ZENITH_GRID_STEP degrees) covering the pass,
+    memoized per atmosphere, and the per-sample values are linearly interpolated in airmass.
+    """
 
     if auto:
         # Get atmospheric parameters once
@@ -33,27 +47,29 @@ def atmospheric_transmittance(auto, model: str, date, lat, lon, alt, wav, zenith
         )
 
     # Convert zenith angles to airmass (secant of zenith)
-    airmass_arr = 1 / np.cos(np.deg2rad(zenith_arr))
+    if cos_zenith is None:
+        cos_zenith = np.cos(np.deg2rad(zenith_arr))
+    airmass_arr = 1 / np.atleast_1d(cos_zenith)
+
+    # Grid nodes bracketing the pass, kept below the horizon singularity
+    zenith_arr = np.atleast_1d(zenith_arr)
+    z_min = math.floor(np.min(zenith_arr) / ZENITH_GRID_STEP) * ZENITH_GRID_STEP
+    z_max = min(math.ceil(np.max(zenith_arr) / ZENITH_GRID_STEP) * ZENITH_GRID_STEP, 89.0)
+    grid_airmass = 1 / np.cos(np.deg2rad(np.arange(z_min, max(z_max, z_min) + ZENITH_GRID_STEP / 2, ZENITH_GRID_STEP)))
 
     # Prepare arguments for parallel calls
-    args = [(a, water_vapour, ozone, pressure, aod_500, angstrom_exponent, cloud, model, alt) for a in airmass_arr]
+    atmosphere = (water_vapour, ozone, pressure, aod_500, angstrom_exponent, cloud, model, alt, wav)
 
     with ThreadPoolExecutor() as executor:
-        results = list(executor.map(lambda p: simulate_for_zenith(*p), args))
-
-    # Use the wl from first result for indexing wavelength
-    wl_ref = results[0][0]
-    index = np.argmin(np.abs(wl_ref - wav))
+        grid_transmittance = np.fromiter(executor.map(lambda a: _transmittance_at_airmass(float(a), *atmosphere), grid_airmass),
+                                         dtype=np.float64, count=len(grid_airmass))
 
-    # Extract transmittances at desired wavelength
-    transmittances = [transm[index] for wl, transm in results]
+    return np.interp(airmass_arr, grid_airmass, grid_transmittance)
 
-    return np.array(transmittances)
 
 
 
-
-def geometric_eff(rec_ap: float, send_ap: float, beam_div: float, range: float) -> float:
+def geometric_eff(rec_ap: float, send_ap: float, beam_div: float, range: np.ndarray) -> np.ndarray:
     """
     Calculate the geometric efficiency of a communication link between a transmitter and receiver.
 
@@ -61,23 +77,25 @@ def geometric_eff(rec_ap: float, send_ap: float, beam_div: float, range: float)
     - rec_ap (float): Receiver aperture diameter (in meters).
     - send_ap (float): Transmitter aperture diameter (in meters).
     - beam_div (float): Beam divergence (in radians).
-    - range (float): Distance between transmitter and receiver (in kilometers).
+    - range (float or np.ndarray): Distance between transmitter and receiver (in kilometers).
 
     Returns:
-    - float: Geometric efficiency of the system.
+    - np.ndarray: Geometric efficiency of the system for each range sample.
     """
     return (rec_ap / (send_ap + (beam_div * range * 1000))) ** 2
 
-def pointing_error_rss(zenith_angle_deg, acc_min, acc_max):
+def pointing_error_rss(zenith_angle_deg, acc_min, acc_max, cos_zenith=None):
     """
     Compute total pointing error (μrad) based on zenith angle (deg)
     using a smooth empirical model.
+
+    If cos_zenith is given it is used instead of recomputing it from zenith_angle_deg.
     """
-    # Convert to radians
-    z = np.radians(zenith_angle_deg)
+    if cos_zenith is None:
+        cos_zenith = np.cos(np.radians(zenith_angle_deg))
     
-    # Smooth ramp function
-    f = np.sin(z) ** 2  # exponent = 2 for moderate roll-off
+    # Smooth ramp function: sin(z)^2
+    f = 1 - cos_zenith ** 2  # exponent = 2 for moderate roll-off
 
     # Total pointing error (RSS)
     theta_pointing = acc_min + (acc_max - acc_min) * f
@@ -85,19 +103,22 @@ def pointing_error_rss(zenith_angle_deg, acc_min, acc_max):
     return theta_pointing*1e-6
 
 
-def pointing_loss( beam_divergence: float, acc_min, acc_max, zenith) -> float:
+def pointing_loss( beam_divergence: float, acc_min, acc_max, zenith, cos_zenith=None) -> np.ndarray:
     """
     Calculate the pointing loss of a communication link between a transmitter and receiver.
 
     Parameters:
-    - pointing_accuracy (float): The pointing accuracy in radians.
     - beam_divergence (float): The full transmitting divergence angle in radians.
+    - acc_min (float): Best case pointing accuracy in microradians.
+    - acc_max (float): Worst case pointing accuracy in microradians.
+    - zenith (float or np.ndarray): Zenith angle(s) in degrees.
+    - cos_zenith (np.ndarray, optional): Precomputed cosine of the zenith angle(s).
 
     Returns:
-    - float: Pointing loss as a value between 0 and 1, where 1 means no loss.
+    - np.ndarray: Pointing loss as a value between 0 and 1, where 1 means no loss.
     """
-    perror = pointing_error_rss(zenith, acc_min, acc_max)
-    ploss = math.exp(-2 * (perror/ (beam_divergence/2)) ** 2)
+    perror = pointing_error_rss(zenith, acc_min, acc_max, cos_zenith)
+    ploss = np.exp(-2 * (perror/ (beam_divergence/2)) ** 2)
     return ploss
 
 
@@ -127,7 +148,25 @@ def cn2_hufnagel_valley(h: float, A0: float, H_OGS: float, v_wind: float = 21.0)
     # Return the total value of C_n^2(h)
     return term1 + term2 + term3
 
-def rytov_variance_hv(wavelength: float, H_OGS: float, H_Turb: float, zenith_angle_deg: float, A0: float, v_wind: float) -> float:
+@lru_cache(maxsize=64)
+def _hv_turbulence_integral(H_OGS: float, H_Turb: float, A0: float, v_wind: float) -> float:
+    """
+    Integral of C_n^2(h) * (h - H_OGS)^(5/6) from H_OGS to H_Turb under the Hufnagel-Valley model.
+
+    It depends only on the turbulence profile, not on the zenith angle, so it is computed once
+    per profile and reused across passes.
+    """
+    # Define the integrand function: C_n^2(h) * (h - H_OGS)^(5/6)
+    def integrand(h):
+        if h <= H_OGS:
+            return 0  # To avoid invalid values below the ground station altitude
+        return cn2_hufnagel_valley(h, A0, H_OGS, v_wind) * (h - H_OGS)**(5/6)
+
+    # Perform numerical integration from H_OGS to H_Turb
+    integral, _ = quad(integrand, H_OGS, H_Turb)
+    return integral
+
+def rytov_variance_hv(wavelength: float, H_OGS: float, H_Turb: float, zenith_angle_deg: float, A0: float, v_wind: float, cos_zenith=None) -> float:
     """
     Calculate the Rytov variance using the Hufnagel-Valley model and numerical integration.
 
@@ -138,29 +177,25 @@ def rytov_variance_hv(wavelength: float, H_OGS: float, H_Turb: float, zenith_ang
         wavelength (float)       : Optical wavelength [m].
         H_OGS (float)           : Ground station altitude [m].
         H_Turb (float)          : Turbulence layer top altitude [m].
-        zenith_angle_deg (float): Zenith angle [degrees].
+        zenith_angle_deg (float or np.ndarray): Zenith angle(s) [degrees].
         A0 (float)              : Ground-level C_n^2 [m^(-2/3)].
         v_wind (float)          : RMS wind speed [m/s].
+        cos_zenith (np.ndarray) : Precomputed cosine of the zenith angle (optional).
 
     Returns:
-        float: Rytov variance (σ_R^2), dimensionless.
+        float or np.ndarray: Rytov variance (σ_R^2), dimensionless, one per zenith angle.
     """
 
     # Wave number
     k = 2 * np.pi / wavelength
 
     # Convert zenith angle to radians and calculate sec(zeta)
-    zeta_rad = np.deg2rad(zenith_angle_deg)
-    sec_zeta = 1 / np.cos(zeta_rad)
-    
-    # Define the integrand function: C_n^2(h) * (h - H_OGS)^(5/6)
-    def integrand(h):
-        if h <= H_OGS:
-            return 0  # To avoid invalid values below the ground station altitude
-        return cn2_hufnagel_valley(h, A0, H_OGS, v_wind) * (h - H_OGS)**(5/6)
+    if cos_zenith is None:
+        cos_zenith = np.cos(np.deg2rad(zenith_angle_deg))
+    sec_zeta = 1 / cos_zenith
     
-    # Perform numerical integration from H_OGS to H_Turb
-    integral, _ = quad(integrand, H_OGS, H_Turb)
+    # Path integral of C_n^2 from H_OGS to H_Turb (memoized per turbulence profile)
+    integral = _hv_turbulence_integral(H_OGS, H_Turb, A0, v_wind)
     
     # Calculate Rytov variance
     sigma_R2 = 2.24 * k**(7/6) * sec_zeta**(11/6) * integral
@@ -225,25 +260,26 @@ def aperture_averaging_factor(aperture_diameter:float, rho_I:float) -> float:
 
 def power_scintillation_index(wavelength:float, aperture_diameter:float, elevation_angle_deg:float, min_elevation_angle:float,
                                altitude_ground_station:float, turbulence_height:float=20000, 
-                               wind_speed:float=21, cn2_ground_level:float=1.7e-14)->float:
+                               wind_speed:float=21, cn2_ground_level:float=1.7e-14, cos_zenith=None)->float:
     """
     Calculate the power scintillation index.
 
     Parameters:
         wavelength (float): Wavelength in meters (e.g., 1550 nm for optical communications).
         aperture_diameter (float): Aperture diameter of the receiver in meters.
-        elevation_angle_deg (float): Zenith angle in degrees (the angle between the line of sight and the zenith).
+        elevation_angle_deg (float or np.ndarray): Elevation angle(s) in degrees.
         altitude_ground_station (float): Altitude of the ground station in meters.
         turbulence_height (float): Altitude of the turbulence layer in meters (default: 20,000 meters).
         wind_speed (float): RMS wind speed in m/s (default: 20 m/s).
         cn2_ground_level (float): Ground-level C_n^2 value in m^(-2/3) (default: 1.7e-14).
+        cos_zenith (np.ndarray, optional): Precomputed cosine of the zenith angle.
 
     Returns:
-        float: Power scintillation index, which quantifies signal strength fluctuations.
+        float or np.ndarray: Power scintillation index, which quantifies signal strength fluctuations.
     """
     # Step 1: Calculate Rytov variance (σ_R^2)
     sigma_R_squared = rytov_variance_hv(wavelength, altitude_ground_station, turbulence_height, 
-                                        90 - elevation_angle_deg, cn2_ground_level, wind_speed)
+                                        90 - elevation_angle_deg, cn2_ground_level, wind_speed, cos_zenith)
     
     # Step 2: Calculate intensity scintillation index (σ_I^2) from Rytov variance
     sigma_I_squared = intensity_scintillation_index(sigma_R_squared)
@@ -257,27 +293,36 @@ def power_scintillation_index(wavelength:float, aperture_diameter:float, elevati
     # Step 5: Return power scintillation index (A(D_r) * σ_I^2)
     return aperture_avg_factor * sigma_I_squared
 
-def scintillation_loss(wavelength:float, aperture:float, theta_deg:float, min_elevation_angle:float, altitude_ground_station:float, p0:float=0.01)->float:
+@lru_cache(maxsize=16)
+def _detection_quantile(p0: float) -> float:
+    """erfinv(2 * p0 - 1), the Gaussian quantile of the detection probability p0."""
+    return float(erfinv(2 * p0 - 1))
+
+def scintillation_loss(wavelength:float, aperture:float, theta_deg:np.ndarray, min_elevation_angle:float, altitude_ground_station:float, p0:float=0.01, cos_zenith=None)->np.ndarray:
     """
     Calculate the scintillation loss due to atmospheric turbulence.
 
+    The turbulence integral does not depend on the elevation angle, so the whole
+    pass is evaluated at once when theta_deg is an array.
+
     Parameters:
         wavelength (float): Wavelength in meters (e.g., 1550 nm for optical communications).
         aperture (float): Aperture diameter of the receiver in meters.
-        theta_deg (float): Elevation angle in degrees.
+        theta_deg (float or np.ndarray): Elevation angle(s) in degrees.
         min_elevation_angle (float): Minimum elevation angle for communication (degrees)
         altitude_ground_station (float): Altitude of the ground station in meters.
         p0 (float, optional): Probability of a photon detection. Default is 0.01.
+        cos_zenith (np.ndarray, optional): Precomputed cosine of the zenith angle(s).
 
     Returns:
-        float: Scintillation loss (dimensionless) in linear scale.
+        np.ndarray: Scintillation loss (dimensionless) in linear scale.
     """
     
     # Step 1: Calculate the power scintillation index
-    sigma_P_squared = power_scintillation_index(wavelength, aperture, theta_deg, min_elevation_angle, altitude_ground_station)
+    sigma_P_squared = power_scintillation_index(wavelength, aperture, theta_deg, min_elevation_angle, altitude_ground_station, cos_zenith=cos_zenith)
     
     # Step 2: Calculate the terms needed for noise (scintillation loss calculation)
-    term1 = erfinv(2 * p0 - 1) * np.sqrt(2 * np.log(sigma_P_squared + 1))
+    term1 = _detection_quantile(p0) * np.sqrt(2 * np.log(sigma_P_squared + 1))
     term2 = 0.5 * np.log(sigma_P_squared + 1)
     
     # Step 3: Calculate the noise 
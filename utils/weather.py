@@ -1,10 +1,59 @@
 from datetime import datetime, timedelta
-import cdsapi
-import xarray as xr
+from functools import lru_cache
 import numpy as np
-from dotenv import load_dotenv
 import os
-import cdsapi
+import math
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+# cdsapi, xarray, dotenv and requests are only needed for retrievals; they are imported where used
+# so that classify_climate callers do not pay for them
+if TYPE_CHECKING:
+    import requests
+
+# Reference wavelength (nm) the AOD is interpolated to, and its log for the Angstrom fit
+AER_LAMBDA0 = 500
+LOG_AER_LAMBDA0 = math.log(AER_LAMBDA0)
+
+# CAMS AOD variables, their wavelengths (nm) and the log wavelengths the Angstrom fit uses
+AOD_VARIABLES = ('aod469', 'aod550', 'aod670', 'aod865', 'aod1240')
+AOD_WAVELENGTHS = (469, 550, 670, 865, 1240)
+LOG_AOD_WAVELENGTHS = tuple(math.log(wl) for wl in AOD_WAVELENGTHS)
+
+# Aerosol values used when CAMS gives fewer than two positive AODs to fit
+DEFAULT_AOD_500 = 0.1
+DEFAULT_ANGSTROM_EXPONENT = 1.4
+
+# Retrieved ERA5/CAMS files, one per distinct request
+WEATHER_CACHE_DIR = Path(os.getenv("OPENSATQKD_WX_CACHE", "~/.cache/opensatqkd/wx")).expanduser()
+
+def _cached_retrieve(client, dataset: str, request: dict) -> Path:
+    """
+    Retrieve `dataset` for `request` into the on-disk cache and return the file path.
+
+    Files are keyed by a hash of the request, so repeated calls skip the download and concurrent
+    callers never write to the same file.
+    """
+    key = hashlib.sha1(json.dumps(request, sort_keys=True).encode()).hexdigest()
+    path = WEATHER_CACHE_DIR / f"{dataset}_{key}.nc"
+    if path.exists():
+        return path
+
+    WEATHER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Download next to the final file and rename it in place, so a partial download is never picked up
+    fd, tmp = tempfile.mkstemp(suffix=".part", dir=WEATHER_CACHE_DIR)
+    os.close(fd)
+    try:
+        client.retrieve(dataset, request, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
 
 def round_to_nearest_3hour(dt):
     hour = dt.hour
@@ -18,7 +67,7 @@ def round_to_nearest_3hour(dt):
 
 def round_to_nearest_hour(dt):
     # Add 30 minutes and truncate to hour
-    return (dt + timedelta(minutes=30))
+    return (dt + timedelta(minutes=30)).replace(minute=0, second=0, microsecond=0)
 
 def classify_climate(lat:float, lon:float, dt:datetime, elevation:float=0)->str:
     """
@@ -42,15 +91,20 @@ def classify_climate(lat:float, lon:float, dt:datetime, elevation:float=0)->str:
     ### Returns:
     - string: Type of atmosphere according to classification.
     """
-    
-    month = dt.month
+    # Only the month of the date matters, so repeated runs over the same site share one entry
+    return _classify_climate(lat, lon, dt.month, elevation)
+
+# Summer months as bit masks (bit m set for month m)
+_NH_SUMMER_MASK = sum(1 << month for month in (4, 5, 6, 7, 8, 9))      # Northern Hemisphere
+_SH_SUMMER_MASK = sum(1 << month for month in (10, 11, 12, 1, 2, 3))   # Southern Hemisphere
+
+@lru_cache(maxsize=4096)
+def _classify_climate(lat:float, lon:float, month:int, elevation:float)->str:
     abs_lat = abs(lat)
 
     # Determine if it's summer at the given latitude
-    if lat >= 0:  
-        is_summer = month in [4, 5, 6, 7, 8, 9] #Northern Hemisphere
-    else:         
-        is_summer = month in [10, 11, 12, 1, 2, 3] # Southern Hemisphere
+    summer_mask = _NH_SUMMER_MASK if lat >= 0 else _SH_SUMMER_MASK
+    is_summer = bool(summer_mask >> month & 1)
 
     # Adjust latitude to reflect elevation impact on climate
     # Approximate: every 150m elevation ~ 1° poleward shift in climate
@@ -83,104 +137,266 @@ def classify_climate(lat:float, lon:float, dt:datetime, elevation:float=0)->str:
     # Fallback (shouldn't be reached unless input is unusual)
     return "us"
 
-def obtain_atmospheric_parameters(date, lat, lon):
+def classify_climate_vec(lat:np.ndarray, lon:np.ndarray, month:np.ndarray, elevation:np.ndarray=0)->np.ndarray:
+    """
+    Vectorized classify_climate over arrays of locations and months (1-12).
 
-    load_dotenv()
+    Follows the same classification as classify_climate and returns an array of climate
+    class codes ('<U2') with the broadcast shape of the inputs.
+    """
+    lat, lon, month, elevation = np.broadcast_arrays(
+        np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64),
+        np.asarray(month, dtype=np.int64), np.asarray(elevation, dtype=np.float64))
+
+    is_summer = (np.where(lat >= 0, _NH_SUMMER_MASK, _SH_SUMMER_MASK) >> month & 1).astype(bool)
+    effective_lat = np.abs(lat) + np.minimum(elevation / 150, 20)
+    is_us_region = (-125 <= lon) & (lon <= -65) & (24 <= lat) & (lat <= 50)
+    tropical = effective_lat < 23.5
+    midlatitude = (23.5 <= effective_lat) & (effective_lat < 50)
+
+    midlatitude_class = np.where(is_summer, "ms", "mw")
+    return np.select(
+        [tropical & (elevation >= 1500), tropical, is_us_region & midlatitude, midlatitude, effective_lat >= 50],
+        [midlatitude_class, "tp", "us", midlatitude_class, np.where(is_summer, "ss", "sw")],
+        default="us",
+    )
+
+# Task polling backs off from 1 s up to CDS_SLEEP_MAX seconds (cdsapi default: 120), so short jobs are
+# picked up promptly; failed requests are retried CDS_RETRY_MAX times (cdsapi default: 500)
+CDS_SLEEP_MAX = 30
+CDS_RETRY_MAX = 10
+
+def _client_session() -> "requests.Session":
+    """HTTP session kept alive across requests, so task polling and downloads reuse connections."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
+
+    # Gateway errors are usually transient, so retry them here with backoff; once the retries run out the
+    # last response is handed back (not raised) so cdsapi's own retry loop still gets its turn
+    retries = Retry(total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False)
+
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+    return session
 
-    # Fetch keys from environment variables
-    cds_key = os.getenv("CDS_API_KEY")
-    ads_key = os.getenv("ADS_API_KEY")
+# Clients are built once per process; each gets its own session (cdsapi otherwise shares one default session)
+@lru_cache(maxsize=1)
+def _cds_client():
+    import cdsapi
+    from dotenv import load_dotenv
 
-        # CDS Client
-    cds = cdsapi.Client(
+    load_dotenv()
+    return cdsapi.Client(
         url='https://cds.climate.copernicus.eu/api',
-        key=cds_key
+        key=os.getenv("CDS_API_KEY"),
+        sleep_max=CDS_SLEEP_MAX,
+        retry_max=CDS_RETRY_MAX,
+        session=_client_session()
     )
 
-    # ADS Client
-    ads = cdsapi.Client(
+@lru_cache(maxsize=1)
+def _ads_client():
+    import cdsapi
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return cdsapi.Client(
         url='https://ads.atmosphere.copernicus.eu/api',
-        key=ads_key
+        key=os.getenv("ADS_API_KEY"),
+        sleep_max=CDS_SLEEP_MAX,
+        retry_max=CDS_RETRY_MAX,
+        session=_client_session()
     )
 
+def _area(min_lat, max_lat, min_lon, max_lon):
+    """CDS area [N, W, S, E] with a 0.1 degree margin around the given bounds."""
+    return [max_lat + 0.1, min_lon - 0.1, min_lat - 0.1, max_lon + 0.1]
 
-    cds.retrieve(
-        'reanalysis-era5-single-levels',
-        {
-            'product_type': 'reanalysis',
-            'format': 'netcdf',
-            'variable': [
-                'surface_pressure',
-                'total_column_water_vapour',
-                'total_column_ozone',
-                'total_cloud_cover',
-            ],
-            'date': date.strftime('%Y-%m-%d'),
-            'time': round_to_nearest_hour(date).strftime('%-H:00'),
-            'area': [lat+0.1, lon-0.1, lat-0.1, lon+0.1],  # small box around location
-        },
-        'era5_parameters.nc'
-    )
+def _era5_request(date: str, time, area) -> dict:
+    return {
+        'product_type': 'reanalysis',
+        'format': 'netcdf',
+        'variable': [
+            'surface_pressure',
+            'total_column_water_vapour',
+            'total_column_ozone',
+            'total_cloud_cover',
+        ],
+        'date': date,
+        'time': time,
+        'area': area,
+    }
 
-    ds = xr.open_dataset("era5_parameters.nc")
+def _cams_request(date: str, time, area) -> dict:
+    return {
+        'variable': [
+            'total_aerosol_optical_depth_469nm',
+            'total_aerosol_optical_depth_550nm',
+            'total_aerosol_optical_depth_670nm',
+            'total_aerosol_optical_depth_865nm',
+            'total_aerosol_optical_depth_1240nm',
+        ],
+        'date': date,
+        'time': time,
+        'format': 'netcdf',
+        'type': 'analysis',
+        'area': area,
+    }
 
-    water_vapour = ds['tcwv'].values[0, 0, 0]  
-    pressure = ds['sp'].values[0, 0, 0]/100
-    ozone = ds['tco3'].values[0, 0, 0]/2.1415e-5
-    #cloud = ds['tcc'].values[0, 0, 0]
+def _fetch_era5(day: str, time: str, lat, lon) -> Path:
+    """Retrieve surface pressure, water vapour, ozone and cloud cover around (lat, lon) from ERA5."""
+    return _cached_retrieve(
+        _cds_client(),
+        'reanalysis-era5-single-levels',
+        _era5_request(day, time, _area(lat, lat, lon, lon)),
+    )
 
-    ads.retrieve(
+def _fetch_cams(day: str, time: str, lat, lon) -> Path:
+    """Retrieve the CAMS aerosol optical depths around (lat, lon)."""
+    return _cached_retrieve(
+        _ads_client(),
         'cams-global-reanalysis-eac4',
-        {
-            'variable': [
-                'total_aerosol_optical_depth_469nm',
-                'total_aerosol_optical_depth_550nm',
-                'total_aerosol_optical_depth_670nm',
-                'total_aerosol_optical_depth_865nm',
-                'total_aerosol_optical_depth_1240nm',
-            ],
-            'date': date.strftime('%Y-%m-%d'),
-            'time': round_to_nearest_3hour(date).strftime('%H:00'),
-            'format': 'netcdf',
-            'type': 'analysis',
-            'area': [lat + 0.1, lon - 0.1, lat - 0.1, lon + 0.1],
-        },
-        'cams_aerosols.nc'
+        _cams_request(day, time, _area(lat, lat, lon, lon)),
     )
-    ds = xr.open_dataset("cams_aerosols.nc")
-
-    # Extract wavelengths and corresponding variable names
-    wavelength_dict = {
-        469: 'aod469',
-        550: 'aod550',
-        670: 'aod670',
-        865: 'aod865',
-        1240: 'aod1240'
-    }
 
-    # Extract available AODs
-    wavelengths = []
+def _era5_values(cell):
+    """Water vapour, ozone and pressure from an ERA5 dataset reduced to a single cell."""
+    water_vapour = float(cell['tcwv'])
+    pressure = float(cell['sp'])/100
+    ozone = float(cell['tco3'])/2.1415e-5
+    #cloud = float(cell['tcc'])
+    return water_vapour, ozone, pressure
+
+def _aod_values(ds):
+    """AOD at 500 nm and Angstrom exponent fitted to the CAMS AODs, averaged over `ds`."""
+    # Extract available AODs, averaging every variable in one reduction over the dataset
+    present = [i for i, var in enumerate(AOD_VARIABLES) if var in ds]
+    means = ds[[AOD_VARIABLES[i] for i in present]].mean().to_array().values.tolist() if present else []
+
+    log_wavelengths = []
     aods = []
 
-    for wl, var in wavelength_dict.items():
-        if var in ds:
-            aod = ds[var].mean().item()
-            if aod > 0:
-                wavelengths.append(wl)
-                aods.append(aod)
+    for i, aod in zip(present, means):
+        if aod > 0:
+            log_wavelengths.append(LOG_AOD_WAVELENGTHS[i])
+            aods.append(aod)
 
-    wavelengths = np.array(wavelengths)
-    aods = np.array(aods)
+    # A line needs two points; otherwise keep the one AOD measured (or a clear-sky default) and a typical exponent
+    if len(aods) < 2:
+        return (aods[0] if aods else DEFAULT_AOD_500), DEFAULT_ANGSTROM_EXPONENT
 
-    # Fit Angstrom exponent
-    log_wavelengths = np.log(wavelengths)
-    log_aods = np.log(aods)
-    slope, intercept = np.polyfit(log_wavelengths, log_aods, 1)
+    # Fit Angstrom exponent (closed-form least-squares line in log-log space; at most five points, so plain math)
+    log_aods = [math.log(aod) for aod in aods]
+    n = len(log_aods)
+    sx = sum(log_wavelengths)
+    sy = sum(log_aods)
+    sxx = sum(x * x for x in log_wavelengths)
+    sxy = sum(x * y for x, y in zip(log_wavelengths, log_aods))
+    slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    intercept = (sy - slope * sx) / n
     angstrom_exponent = -slope
 
     # Interpolate AOD at 500nm
-    aer_lambda0 = 500  # nm
-    log_aod_500 = slope * np.log(aer_lambda0) + intercept
-    aod_500 = np.exp(log_aod_500)
+    log_aod_500 = slope * LOG_AER_LAMBDA0 + intercept
+    aod_500 = math.exp(log_aod_500)
+
+    return aod_500, angstrom_exponent
+
+def _nearest_cell(ds, time: str, lat, lon):
+    """Select the grid cell and time step of `ds` closest to (time, lat, lon)."""
+    time_dim = 'valid_time' if 'valid_time' in ds.dims else 'time'
+    return ds.sel({time_dim: np.datetime64(time), 'latitude': lat, 'longitude': lon}, method='nearest')
+
+# (AOD at 500 nm, Angstrom exponent) per (1 degree latitude, 1 degree longitude, month), filled by every CAMS fit
+_aod_climatology = {}
+
+def obtain_atmospheric_parameters(date, lat, lon, aod_mode="exact"):
+    """
+    Water vapour, ozone, pressure, AOD at 500 nm and Angstrom exponent at (lat, lon) for `date`.
+
+    With aod_mode="climo" the aerosol values are reused from an earlier fit in the same 1 degree cell
+    and month when one exists, skipping the CAMS retrieval; "exact" always fetches CAMS for `date`.
+    """
+    if aod_mode not in ("exact", "climo"):
+        raise ValueError(f"Unknown aod_mode {aod_mode!r}; expected 'exact' or 'climo'.")
+
+    # Calls that round to the same ERA5 hour, CAMS 3-hour slot and 0.1 degree location share one result
+    return _obtain_atmospheric_parameters(
+        date.strftime('%Y-%m-%d'),
+        round_to_nearest_hour(date).strftime('%H:00'),
+        round_to_nearest_3hour(date).strftime('%H:00'),
+        round(lat, 1),
+        round(lon, 1),
+        aod_mode,
+    )
+
+@lru_cache(maxsize=4096)
+def _obtain_atmospheric_parameters(day: str, era5_time: str, cams_time: str, lat: float, lon: float, aod_mode: str):
+    import xarray as xr
+
+    climo_key = (round(lat), round(lon), int(day[5:7]))
+    reuse_aod = aod_mode == "climo" and climo_key in _aod_climatology
+
+    # CDS and ADS queue requests independently, so wait on both at once
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        era5_future = executor.submit(_fetch_era5, day, era5_time, lat, lon)
+        cams_future = None if reuse_aod else executor.submit(_fetch_cams, day, cams_time, lat, lon)
+        era5_path = era5_future.result()
+        cams_path = None if reuse_aod else cams_future.result()
+
+    # Only single cells are read: skip time decoding and the in-memory cache, so each read touches one value
+    with xr.open_dataset(era5_path, decode_times=False, cache=False) as ds:
+        water_vapour, ozone, pressure = _era5_values(ds.isel({dim: 0 for dim in ds['tcwv'].dims}))
+
+    if reuse_aod:
+        aod_500, angstrom_exponent = _aod_climatology[climo_key]
+    else:
+        with xr.open_dataset(cams_path, decode_times=False) as ds:
+            aod_500, angstrom_exponent = _aod_values(ds)
+        _aod_climatology[climo_key] = (aod_500, angstrom_exponent)
 
     return water_vapour, ozone, pressure, aod_500, angstrom_exponent
+
+def obtain_atmospheric_parameters_batch(points):
+    """
+    Atmospheric parameters for many (date, lat, lon) points.
+
+    Points are grouped by day and each day is fetched with a single ERA5 and a single CAMS request
+    covering the bounding box and the rounded times of all its points, instead of one queued request
+    pair per point. Each point then reads the grid cell nearest to it.
+
+    Returns:
+        list: (water_vapour, ozone, pressure, aod_500, angstrom_exponent) per point, in the order of `points`.
+    """
+    import xarray as xr
+
+    days = {}
+    for i, (date, _, _) in enumerate(points):
+        days.setdefault(date.strftime('%Y-%m-%d'), []).append(i)
+
+    results = [None] * len(points)
+    for day, indices in days.items():
+        lats = [points[i][1] for i in indices]
+        lons = [points[i][2] for i in indices]
+        area = _area(min(lats), max(lats), min(lons), max(lons))
+        era5_times = {i: round_to_nearest_hour(points[i][0]).strftime('%H:00') for i in indices}
+        cams_times = {i: round_to_nearest_3hour(points[i][0]).strftime('%H:00') for i in indices}
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            era5_future = executor.submit(_cached_retrieve, _cds_client(), 'reanalysis-era5-single-levels',
+                                          _era5_request(day, sorted(set(era5_times.values())), area))
+            cams_future = executor.submit(_cached_retrieve, _ads_client(), 'cams-global-reanalysis-eac4',
+                                          _cams_request(day, sorted(set(cams_times.values())), area))
+            era5_path = era5_future.result()
+            cams_path = cams_future.result()
+
+        with xr.open_dataset(era5_path) as era5, xr.open_dataset(cams_path) as cams:
+            for i in indices:
+                _, lat, lon = points[i]
+                results[i] = (
+                    _era5_values(_nearest_cell(era5, f"{day}T{era5_times[i]}", lat, lon))
+                    + _aod_values(_nearest_cell(cams, f"{day}T{cams_times[i]}", lat, lon))
+                )
+
+    return results